@@ -0,0 +1,414 @@
+"""
+End-to-end MCP load generator.
+
+Runs as a real MCP client against server.py (spawned over stdio, or an
+already running HTTP server with --url) and replays a weighted mix of tool
+calls at a target rate (--rate, open loop) or concurrency (--concurrency,
+closed loop). Reports throughput, p50/p95/p99 latency and error rates per
+operation and writes JSON results that later runs can be compared against.
+
+Example against a local rippled in standalone mode (`rippled -a --start`):
+    python loadtest.py --network ws://localhost:6006 --ledger-accept ws://localhost:6006 \\
+        --fund --rate 20 --duration 60 --output results.json --baseline previous.json
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.transaction import submit_and_wait
+from xrpl.models.requests import GenericRequest
+from xrpl.models.transactions import Payment
+from xrpl.utils import xrp_to_drops
+from xrpl.wallet import Wallet
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Standalone rippled starts with all XRP in the genesis account
+GENESIS_SEED = "snoPBrXtMeMyMHUVTgbuqAfg1SUTb"
+GENESIS_ADDRESS = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+
+DEFAULT_MIX = "timestamp=2,verify_hash_hit=3,verify_hash_miss=2,verify_b64_hit=1,verify_b64_miss=1,mint=1,pay_fee=1"
+OPERATIONS = ("timestamp", "verify_hash_hit", "verify_hash_miss", "verify_b64_hit", "verify_b64_miss", "mint", "pay_fee")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse an operation mix such as "timestamp=2,verify_hash_hit=3".
+    
+    Args:
+        mix: Comma-separated operation=weight pairs
+    
+    Returns:
+        Dictionary of operation weights
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}' (expected one of {', '.join(OPERATIONS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def parse_size(size: str) -> int:
+    """Parse a document size such as 512, 64k or 1m into bytes."""
+    units = {"k": 1024, "m": 1024 * 1024}
+    size = size.strip().lower()
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class LoadState:
+    """Proofs created during the run, so verify hits have something to find."""
+    
+    def __init__(self, doc_sizes: List[int]):
+        self.doc_sizes = doc_sizes
+        self.hashes: List[str] = []
+        self.documents: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        # Random base documents per size; misses perturb a copy
+        self.miss_bases = {size: os.urandom(size) for size in doc_sizes}
+    
+    def random_document(self, size: int) -> Tuple[str, str]:
+        data = os.urandom(min(16, size)) + self.miss_bases[size][16:]
+        return base64.b64encode(data).decode(), hashlib.sha256(data).hexdigest()
+
+
+class Recorder:
+    """Latencies and errors per operation."""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+    
+    def success(self, operation: str, seconds: float):
+        self.latencies[operation].append(seconds * 1000)
+    
+    def failure(self, operation: str, message: str):
+        self.errors[operation][message.splitlines()[0][:160] if message else "error"] += 1
+    
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        operations = {}
+        all_latencies: List[float] = []
+        total_errors = 0
+        
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            latencies = sorted(self.latencies[operation])
+            errors = sum(self.errors[operation].values())
+            calls = len(latencies) + errors
+            all_latencies.extend(latencies)
+            total_errors += errors
+            operations[operation] = self._stats(latencies, errors, calls, elapsed)
+        
+        all_latencies.sort()
+        total_calls = len(all_latencies) + total_errors
+        return {
+            "operations": operations,
+            "total": self._stats(all_latencies, total_errors, total_calls, elapsed),
+            "errors": {operation: dict(counter) for operation, counter in self.errors.items() if counter}
+        }
+    
+    @staticmethod
+    def _stats(latencies: List[float], errors: int, calls: int, elapsed: float) -> Dict[str, Any]:
+        return {
+            "calls": calls,
+            "ok": len(latencies),
+            "errors": errors,
+            "errorRate": round(errors / calls, 4) if calls else 0.0,
+            "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None
+        }
+
+
+def build_call(operation: str, state: LoadState, args: argparse.Namespace) -> Tuple[str, dict, Any]:
+    """
+    Pick arguments for one call of an operation.
+    
+    Returns:
+        (tool name, arguments, expected `found` for verify calls or the hash to remember)
+    """
+    if operation == "timestamp":
+        sha256_hash = os.urandom(32).hex()
+        return "xrpl_timestamp", {"sha256_hex_str": sha256_hash, "meta": {"serviceId": "loadtest"}}, sha256_hash
+    
+    if operation == "verify_hash_hit" and state.hashes:
+        return "verify", {"hash_or_pdf_b64": random.choice(state.hashes)}, True
+    
+    if operation == "verify_b64_hit":
+        candidates = [doc for size in state.doc_sizes for doc in state.documents[size]]
+        if candidates:
+            return "verify", {"hash_or_pdf_b64": random.choice(candidates)[0]}, True
+    
+    if operation == "verify_b64_miss" or operation == "verify_b64_hit":
+        b64, _ = state.random_document(random.choice(state.doc_sizes))
+        return "verify", {"hash_or_pdf_b64": b64}, False
+    
+    if operation in ("verify_hash_miss", "verify_hash_hit"):
+        return "verify", {"hash_or_pdf_b64": os.urandom(32).hex()}, False
+    
+    if operation == "mint":
+        return "xrpl_mint_document_nft", {
+            "cid": f"loadtest-{os.urandom(8).hex()}",
+            "meta": {"sha256": os.urandom(32).hex(), "title": "Load test certificate"}
+        }, None
+    
+    return "pay_fee", {"amount_minor": args.pay_amount, "destination": args.pay_destination, "memo": "loadtest"}, None
+
+
+async def call(client: Client, operation: str, state: LoadState, recorder: Recorder,
+               args: argparse.Namespace, started: Optional[float] = None):
+    """Make one tool call and record its latency (from `started`, if scheduled)."""
+    tool, arguments, expected = build_call(operation, state, args)
+    started = started if started is not None else time.perf_counter()
+    
+    try:
+        result = await client.call_tool(tool, arguments, timeout=args.call_timeout)
+    except Exception as e:
+        recorder.failure(operation, f"{type(e).__name__}: {str(e)}")
+        return
+    
+    elapsed = time.perf_counter() - started
+    data = getattr(result, "structured_content", None) or {}
+    
+    if tool == "verify" and isinstance(expected, bool) and data.get("found") is not expected:
+        recorder.failure(operation, "unexpected hit" if data.get("found") else "unexpected miss")
+        return
+    if operation == "timestamp":
+        state.hashes.append(expected)
+    
+    recorder.success(operation, elapsed)
+
+
+async def warm_up(client: Client, state: LoadState, count: int, documents: bool):
+    """Timestamp proofs (hashes, and one document per size) for verify hits."""
+    for _ in range(count):
+        sha256_hash = os.urandom(32).hex()
+        await client.call_tool("xrpl_timestamp", {"sha256_hex_str": sha256_hash, "meta": {"serviceId": "loadtest"}})
+        state.hashes.append(sha256_hash)
+    
+    for size in state.doc_sizes if documents else []:
+        b64, sha256_hash = state.random_document(size)
+        await client.call_tool("xrpl_timestamp", {"sha256_hex_str": sha256_hash, "meta": {"serviceId": "loadtest"}})
+        state.documents[size].append((b64, sha256_hash))
+
+
+async def accept_ledgers(url: str, interval: float, stop: asyncio.Event):
+    """Close ledgers on a standalone node, which never closes them by itself."""
+    async with AsyncWebsocketClient(url) as client:
+        while not stop.is_set():
+            await client.request(GenericRequest(method="ledger_accept"))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def fund_wallets(url: str, seeds: List[str], amount_xrp: int):
+    """Fund the server's wallets from the standalone genesis account."""
+    genesis = Wallet.from_seed(GENESIS_SEED)
+    async with AsyncWebsocketClient(url) as client:
+        for seed in seeds:
+            address = Wallet.from_seed(seed).address
+            await submit_and_wait(
+                Payment(account=genesis.address, destination=address, amount=xrp_to_drops(amount_xrp)),
+                client,
+                genesis
+            )
+            print(f"💰 Funded {address} with {amount_xrp} XRP")
+
+
+async def run_load(client: Client, state: LoadState, recorder: Recorder, args: argparse.Namespace) -> float:
+    """Drive the mix for the configured duration; returns elapsed seconds."""
+    mix = parse_mix(args.mix)
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    
+    def pick() -> str:
+        return random.choices(operations, weights)[0]
+    
+    start = time.perf_counter()
+    deadline = start + args.duration
+    
+    if args.rate:
+        # Open loop: arrivals follow the schedule regardless of response times,
+        # and latency counts from the scheduled start so queueing is not hidden
+        tasks = []
+        i = 0
+        while True:
+            scheduled = start + i / args.rate
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(call(client, pick(), state, recorder, args, started=scheduled)))
+            i += 1
+        await asyncio.gather(*tasks)
+    else:
+        async def worker():
+            while time.perf_counter() < deadline:
+                await call(client, pick(), state, recorder, args)
+        
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    
+    return time.perf_counter() - start
+
+
+def print_report(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Print per-operation results, with deltas against a baseline run."""
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+    
+    def delta(current, previous):
+        if current is None or not previous:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.0f}%)"
+    
+    print(f"\n{'operation':<18}{'calls':>7}{'err%':>7}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = list(summary["operations"].items()) + [("TOTAL", summary["total"])]
+    for operation, stats in rows:
+        print(f"{operation:<18}{stats['calls']:>7}{stats['errorRate'] * 100:>6.1f}%{stats['throughput']:>9.2f}"
+              f"{fmt(stats['p50']):>10}{fmt(stats['p95']):>10}{fmt(stats['p99']):>10}{fmt(stats['max']):>10}")
+    
+    for operation, errors in summary["errors"].items():
+        for message, count in sorted(errors.items(), key=lambda item: -item[1])[:3]:
+            print(f"   ⚠️ {operation}: {count}× {message}")
+    
+    if baseline:
+        print("\n📊 Compared with baseline:")
+        previous_ops = dict(baseline["operations"], TOTAL=baseline["total"])
+        for operation, stats in rows:
+            previous = previous_ops.get(operation)
+            if not previous:
+                continue
+            print(f"   {operation:<18} ops/s {stats['throughput']:.2f}{delta(stats['throughput'], previous['throughput'])}"
+                  f"  p50 {fmt(stats['p50'])}{delta(stats['p50'], previous['p50'])}"
+                  f"  p95 {fmt(stats['p95'])}{delta(stats['p95'], previous['p95'])}"
+                  f"  p99 {fmt(stats['p99'])}{delta(stats['p99'], previous['p99'])}"
+                  f"  err {stats['errorRate'] * 100:.1f}% (was {previous['errorRate'] * 100:.1f}%)")
+
+
+async def main(args: argparse.Namespace) -> int:
+    load_dotenv()
+    
+    if args.url:
+        client = Client(args.url)
+    else:
+        env = dict(os.environ, MCP_TRANSPORT="stdio")
+        if args.network:
+            env["XRPL_NETWORK"] = args.network
+        client = Client(PythonStdioTransport(os.path.join(ROOT, "server.py"), env=env, cwd=ROOT))
+    
+    stop = asyncio.Event()
+    ticker = None
+    if args.ledger_accept:
+        ticker = asyncio.create_task(accept_ledgers(args.ledger_accept, args.ledger_interval, stop))
+    
+    state = LoadState([parse_size(size) for size in args.b64_sizes.split(",")])
+    recorder = Recorder()
+    
+    try:
+        if args.fund:
+            seeds = [os.getenv("XRPL_TESTNET_SEED", "")] + os.getenv("XRPL_TESTNET_SEEDS", "").split(",")
+            await fund_wallets(args.ledger_accept or args.network, [s.strip() for s in seeds if s.strip()], args.fund_xrp)
+        
+        async with client:
+            mix = parse_mix(args.mix)
+            hashes = args.warmup if "verify_hash_hit" in mix else 0
+            documents = "verify_b64_hit" in mix
+            if hashes or documents:
+                print(f"🔥 Warming up ({hashes} proofs, {len(state.doc_sizes) if documents else 0} documents)...")
+                await warm_up(client, state, hashes, documents)
+            
+            mode = f"{args.rate}/s" if args.rate else f"concurrency {args.concurrency}"
+            print(f"🚀 Running {args.mix} at {mode} for {args.duration}s...")
+            elapsed = await run_load(client, state, recorder, args)
+    finally:
+        stop.set()
+        if ticker is not None:
+            await ticker
+    
+    summary = recorder.summary(elapsed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+    
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+        with open(args.output, "w") as f:
+            json.dump({
+                "startedAt": datetime.now(timezone.utc).isoformat(),
+                "elapsed": round(elapsed, 3),
+                "config": config,
+                **summary
+            }, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    
+    return 0
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the XRPL proof MCP server end to end.")
+    target = parser.add_argument_group("target")
+    target.add_argument("--url", help="MCP URL of a running HTTP server (default: spawn server.py over stdio)")
+    target.add_argument("--network", help="XRPL_NETWORK for the spawned server, e.g. ws://localhost:6006")
+    target.add_argument("--ledger-accept", help="Admin WebSocket of a standalone rippled to close ledgers on")
+    target.add_argument("--ledger-interval", type=float, default=1.0, help="Seconds between ledger closes")
+    target.add_argument("--fund", action="store_true", help="Fund the server wallets from the standalone genesis account")
+    target.add_argument("--fund-xrp", type=int, default=100000, help="XRP sent to each wallet by --fund")
+    
+    load = parser.add_argument_group("load")
+    mode = load.add_mutually_exclusive_group()
+    mode.add_argument("--rate", type=float, help="Target calls/second (open loop)")
+    mode.add_argument("--concurrency", type=int, default=8, help="Calls in flight (closed loop, default)")
+    load.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    load.add_argument("--mix", default=DEFAULT_MIX, help=f"operation=weight pairs (default: {DEFAULT_MIX})")
+    load.add_argument("--b64-sizes", default="1k,64k,1m", help="Document sizes for Base64 verify calls")
+    load.add_argument("--warmup", type=int, default=20, help="Proofs timestamped before the run for verify hits")
+    load.add_argument("--pay-amount", type=int, default=1000, help="Drops per pay_fee call")
+    load.add_argument("--pay-destination", default=GENESIS_ADDRESS, help="Destination of pay_fee calls")
+    load.add_argument("--call-timeout", type=float, default=300, help="Seconds before a call counts as failed")
+    
+    results = parser.add_argument_group("results")
+    results.add_argument("--output", help="Write JSON results to this file")
+    results.add_argument("--baseline", help="Compare with the JSON results of a previous run")
+    
+    args = parser.parse_args(argv)
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.fund and not (args.ledger_accept or args.network):
+        parser.error("--fund needs --ledger-accept or --network")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
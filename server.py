@@ -6,10 +6,15 @@ on the XRP Ledger testnet, verifying proofs, and minting NFT certificates.
 """
 
 import os
+import sys
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Callable, List, Optional
 from dotenv import load_dotenv
 from fastmcp import FastMCP
+from xrpl.models.transactions import AccountSet
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 from src.xrpl_client import XRPLClient
 from src.hash_utils import (
@@ -20,38 +25,238 @@ from src.hash_utils import (
 )
 from src.nft_handler import NFTHandler
 from src.verification import ProofVerifier
+from src.proof_store import ProofStore, iso_to_unix
+from src.digest_table import DigestTable
+from src.tx_cache import TransactionCache
+from src.outbox import open_outbox
+from src.upload_sessions import UploadSessionStore
+from src.scheduler import RequestScheduler, PRIORITY_READ, PRIORITY_WRITE
+from src import tracing
+from src.tracing import span, traced
 
 # Load environment variables
 load_dotenv()
 
+# Tracing spans and the slow-call profiler are opt-in via MCP_TRACE_* / MCP_PROFILE_*
+tracing.configure_from_env()
+
 # Initialize MCP server
 mcp = FastMCP("XRPL Proof & Certificates")
 
+# Admission control in front of the XRPL node.
+# Rate and burst are node requests; costs estimate requests made per tool call.
+scheduler = RequestScheduler(
+    rate=float(os.getenv("MCP_RATE_LIMIT", "10")),
+    burst=float(os.getenv("MCP_RATE_BURST", "20")),
+    max_queue=int(os.getenv("MCP_MAX_QUEUE", "100")),
+    queue_timeout=float(os.getenv("MCP_QUEUE_TIMEOUT", "30")),
+    concurrency={
+        "verify": int(os.getenv("MCP_CONCURRENCY_VERIFY", "8")),
+        "xrpl_timestamp": int(os.getenv("MCP_CONCURRENCY_TIMESTAMP", "4")),
+        "xrpl_mint_document_nft": int(os.getenv("MCP_CONCURRENCY_MINT", "2")),
+        "pay_fee": int(os.getenv("MCP_CONCURRENCY_PAY_FEE", "2")),
+        "xrpl_timestamp_batch": int(os.getenv("MCP_CONCURRENCY_BATCH", "1")),
+    },
+    costs={
+        # Upload tools only hash locally and never touch the node
+        "begin_document": 0,
+        "append_chunk": 0,
+        "finish_document": 0,
+        "verify": 1,
+        # Answered from the local proof index
+        "search_proofs": 0,
+        "xrpl_timestamp": 5,
+        "xrpl_mint_document_nft": 5,
+        "pay_fee": 5,
+    }
+)
+
+# Chunked document uploads (only incremental hash state is kept in memory)
+upload_sessions = UploadSessionStore(
+    ttl=float(os.getenv("MCP_UPLOAD_TTL", "900")),
+    max_sessions=int(os.getenv("MCP_UPLOAD_MAX_SESSIONS", "100")),
+    max_bytes=int(os.getenv("MCP_UPLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+)
+
 # Initialize XRPL client (will be set up on first tool call)
 xrpl_client = None
 nft_handler = None
 proof_verifier = None
+_init_lock = threading.Lock()
 
 
-def initialize_clients():
-    """Initialize XRPL clients if not already initialized."""
+def initialize_clients(outbox: bool = True):
+    """
+    Initialize XRPL clients if not already initialized.
+    
+    Args:
+        outbox: Open the write outbox and recover its pending writes
+            (off for maintenance commands running next to a server)
+    """
     global xrpl_client, nft_handler, proof_verifier
     
-    if xrpl_client is None:
-        seed = os.getenv("XRPL_TESTNET_SEED")
-        network = os.getenv("XRPL_NETWORK", "wss://s.altnet.rippletest.net:51233")
+    # Tool calls run on worker threads, so only one of them may initialize
+    with _init_lock:
+        if xrpl_client is None:
+            seed = os.getenv("XRPL_TESTNET_SEED")
+            network = os.getenv("XRPL_NETWORK", "wss://s.altnet.rippletest.net:51233")
+            # Optional comma-separated seeds of additional issuing wallets
+            extra_seeds = [s for s in os.getenv("XRPL_TESTNET_SEEDS", "").split(",") if s.strip()]
+            
+            if not seed:
+                raise ValueError("XRPL_TESTNET_SEED not found in environment variables")
+            
+            # Validated transaction lookups: in-memory LRU backed by SQLite
+            tx_cache = TransactionCache(
+                path=os.getenv("XRPL_TX_CACHE_PATH", ".cache/tx_cache.sqlite3") or None,
+                max_entries=int(os.getenv("XRPL_TX_CACHE_SIZE", "1024"))
+            )
+            
+            # Writes are logged here before signing and recovered after a restart;
+            # every server process gets its own slot next to this path
+            outbox_path = os.getenv("XRPL_OUTBOX_PATH", ".cache/outbox.jsonl") if outbox else ""
+            write_outbox = None
+            if outbox_path:
+                try:
+                    write_outbox = open_outbox(outbox_path)
+                except Exception as e:
+                    print(f"⚠️ Outbox unavailable: {str(e)}")
+                if write_outbox is None:
+                    # Reads must never fail because of the outbox
+                    print("⚠️ No free outbox slot; writes are submitted directly")
+            
+            xrpl_client = XRPLClient(
+                seed=seed,
+                network_url=network,
+                extra_seeds=extra_seeds,
+                tx_cache=tx_cache,
+                outbox=write_outbox
+            )
+            xrpl_client.recover_outbox()
+            # Certificate URIs: versioned compact form by default, "legacy" for plain JSON
+            nft_handler = NFTHandler(
+                xrpl_client,
+                uri_format=os.getenv("NFT_URI_FORMAT", "compact"),
+                compress=os.getenv("NFT_URI_COMPRESS", "true").lower() in ("1", "true", "yes")
+            )
+            
+            # Anchored proofs by hash, filled by verify scans, timestamp tools and rebuild-index
+            proof_store = ProofStore(
+                path=os.getenv("XRPL_PROOF_STORE_PATH", ".cache/proofs.sqlite3") or ":memory:",
+                explorer_base=xrpl_client.explorer_base
+            )
+            # Digest table mapped by every server process; empty path keeps it in memory
+            digest_table = DigestTable(os.getenv("XRPL_DIGEST_TABLE_PATH", ".cache/digests") or None)
+            proof_verifier = ProofVerifier(xrpl_client, store=proof_store, table=digest_table)
+            
+            print("🚀 XRPL MCP Server initialized")
+
+
+def record_proof(sha256_hex_str: str, meta: Optional[dict] = None) -> dict:
+    """
+    Record a document hash on the XRP Ledger (shared by timestamping tools).
+    
+    Args:
+        sha256_hex_str: SHA-256 hash of the document (64 hex characters)
+        meta: Optional metadata dictionary
         
-        if not seed:
-            raise ValueError("XRPL_TESTNET_SEED not found in environment variables")
+    Returns:
+        Dictionary with transaction hash, explorer URL, and ledger index
+    """
+    initialize_clients()
+    
+    # Validate hash format
+    if not is_valid_sha256(sha256_hex_str):
+        raise ValueError(f"Invalid SHA-256 hash format. Expected 64 hex characters, got: {sha256_hex_str}")
+    
+    # Build memo payload
+    memo_data = {
+        "hash": sha256_hex_str.lower(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+    
+    if meta:
+        memo_data["metadata"] = meta
+    
+    # Submit transaction
+    result = xrpl_client.submit_memo_transaction(memo_data)
+    proof_verifier.record_submissions([(memo_data, result)])
+    
+    return result
+
+
+def record_proofs(sha256_hex_strs: List[str], meta: Optional[dict] = None,
+                  pace: Optional[Callable[[float], None]] = None) -> dict:
+    """
+    Record many document hashes on the XRP Ledger in one signed batch.
+    
+    Args:
+        sha256_hex_strs: SHA-256 hashes of the documents
+        meta: Optional metadata dictionary applied to every proof
+        pace: Called before each submission to wait for the rate limiter
         
-        xrpl_client = XRPLClient(seed=seed, network_url=network)
-        nft_handler = NFTHandler(xrpl_client)
-        proof_verifier = ProofVerifier(xrpl_client)
+    Returns:
+        Dictionary with per-hash results and validated/failed counts
+    """
+    initialize_clients()
+    
+    for sha256_hex_str in sha256_hex_strs:
+        if not is_valid_sha256(sha256_hex_str):
+            raise ValueError(f"Invalid SHA-256 hash format. Expected 64 hex characters, got: {sha256_hex_str}")
+    
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    builders = []
+    memos = []
+    for sha256_hex_str in sha256_hex_strs:
+        memo_data = {"hash": sha256_hex_str.lower(), "timestamp": timestamp}
+        if meta:
+            memo_data["metadata"] = meta
+        memos.append(memo_data)
+        memo = xrpl_client.build_proof_memo(memo_data)
+        builders.append(lambda address, memo=memo: AccountSet(account=address, memos=[memo]))
+    
+    results = xrpl_client.submit_batch(builders, pace=pace)
+    validated = []
+    for sha256_hex_str, memo_data, result in zip(sha256_hex_strs, memos, results):
+        result["sha256"] = sha256_hex_str.lower()
+        if "error" not in result:
+            validated.append((memo_data, result))
+    # One store commit and one digest-table append for the whole batch
+    proof_verifier.record_submissions(validated)
+    
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "results": results,
+        "validated": len(results) - failed,
+        "failed": failed
+    }
+
+
+def verify_hash(sha256_hash: str) -> dict:
+    """
+    Verify a document hash on the XRP Ledger (shared by verification tools).
+    
+    Args:
+        sha256_hash: SHA-256 hash of the document
         
-        print("🚀 XRPL MCP Server initialized")
+    Returns:
+        Verification result dictionary
+    """
+    initialize_clients()
+    
+    # Validate hash
+    if not is_valid_sha256(sha256_hash):
+        raise ValueError(f"Invalid or corrupted hash: {sha256_hash}")
+    
+    # Verify proof
+    result = proof_verifier.verify_proof(sha256_hash)
+    
+    return result
 
 
 @mcp.tool()
+@traced("tool.xrpl_timestamp")
+@scheduler.schedule("xrpl_timestamp", priority=PRIORITY_WRITE)
 def xrpl_timestamp(sha256_hex_str: str, meta: Optional[dict] = None) -> dict:
     """
     Create a timestamped proof of a document on the XRP Ledger.
@@ -74,31 +279,16 @@ def xrpl_timestamp(sha256_hex_str: str, meta: Optional[dict] = None) -> dict:
         {
             "txHash": "ABC123...",
             "explorerUrl": "https://testnet.xrpl.org/transactions/ABC123...",
-            "ledgerIndex": 12345
+            "ledgerIndex": 12345,
+            "closeTime": "2025-10-25T10:30:01Z"
         }
     """
-    initialize_clients()
-    
-    # Validate hash format
-    if not is_valid_sha256(sha256_hex_str):
-        raise ValueError(f"Invalid SHA-256 hash format. Expected 64 hex characters, got: {sha256_hex_str}")
-    
-    # Build memo payload
-    memo_data = {
-        "hash": sha256_hex_str.lower(),
-        "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
-    
-    if meta:
-        memo_data["metadata"] = meta
-    
-    # Submit transaction
-    result = xrpl_client.submit_memo_transaction(memo_data)
-    
-    return result
+    return record_proof(sha256_hex_str, meta)
 
 
 @mcp.tool()
+@traced("tool.verify")
+@scheduler.schedule("verify", priority=PRIORITY_READ)
 def verify(hash_or_pdf_b64: str) -> dict:
     """
     Verify if a document proof exists on the XRP Ledger.
@@ -135,20 +325,74 @@ def verify(hash_or_pdf_b64: str) -> dict:
     else:
         # Base64 PDF - compute hash
         print(f"📄 Input detected as Base64 data, computing hash...")
-        sha256_hash = compute_sha256_from_b64(hash_or_pdf_b64)
+        with span("hash.sha256_from_b64", input_chars=len(hash_or_pdf_b64)):
+            sha256_hash = compute_sha256_from_b64(hash_or_pdf_b64)
         print(f"   Computed hash: {sha256_hash}")
     
-    # Validate hash
-    if not is_valid_sha256(sha256_hash):
-        raise ValueError(f"Invalid or corrupted hash: {sha256_hash}")
+    return verify_hash(sha256_hash)
+
+
+@mcp.tool()
+@traced("tool.search_proofs")
+@scheduler.schedule("search_proofs", priority=PRIORITY_READ)
+def search_proofs(
+    service_id: Optional[str] = None,
+    case_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> dict:
+    """
+    Search recorded proofs by serviceId, caseId and time range.
     
-    # Verify proof
-    result = proof_verifier.verify_proof(sha256_hash)
+    Answers from the local proof index (proofs timestamped by this server,
+    found by `verify`, or loaded with `rebuild-index`), newest first.
     
-    return result
+    Args:
+        service_id: Only proofs whose metadata serviceId matches
+        case_id: Only proofs whose metadata caseId matches
+        since: Only proofs at or after this ISO timestamp
+        until: Only proofs at or before this ISO timestamp
+        limit: Page size (1-500)
+        cursor: `nextCursor` from the previous page
+        
+    Returns:
+        Dictionary with matching proofs and the cursor of the next page
+        
+    Example:
+        >>> search_proofs(case_id="CR-2024-001")
+        {
+            "proofs": [{"sha256": "a7ffc6f8...", "txHash": "ABC123...", ...}],
+            "count": 1,
+            "nextCursor": null
+        }
+    """
+    initialize_clients()
+    
+    if not 1 <= limit <= 500:
+        raise ValueError(f"limit must be between 1 and 500, got: {limit}")
+    
+    bounds = {}
+    for name, value in (("since", since), ("until", until)):
+        if value is not None:
+            bounds[name] = iso_to_unix(value)
+            if bounds[name] is None:
+                raise ValueError(f"Invalid {name} timestamp, expected ISO 8601: {value}")
+    
+    with span("proof_store.search", limit=limit):
+        return proof_verifier.store.search(
+            service_id=service_id,
+            case_id=case_id,
+            limit=limit,
+            cursor=cursor,
+            **bounds
+        )
 
 
 @mcp.tool()
+@traced("tool.xrpl_mint_document_nft")
+@scheduler.schedule("xrpl_mint_document_nft", priority=PRIORITY_WRITE)
 def xrpl_mint_document_nft(cid: str, meta: Optional[dict] = None) -> dict:
     """
     Mint an NFT certificate for a government document on the XRP Ledger.
@@ -190,6 +434,8 @@ def xrpl_mint_document_nft(cid: str, meta: Optional[dict] = None) -> dict:
 
 
 @mcp.tool()
+@traced("tool.pay_fee")
+@scheduler.schedule("pay_fee", priority=PRIORITY_WRITE)
 def pay_fee(amount_minor: int, destination: str, memo: Optional[str] = None) -> dict:
     """
     Process a payment on the XRP Ledger testnet (simulates government service fees).
@@ -231,8 +477,204 @@ def pay_fee(amount_minor: int, destination: str, memo: Optional[str] = None) ->
     return result
 
 
+@mcp.tool()
+@traced("tool.xrpl_timestamp_batch")
+async def xrpl_timestamp_batch(sha256_hex_strs: List[str], meta: Optional[dict] = None) -> dict:
+    """
+    Create timestamped proofs for many documents in one bulk run.
+    
+    Transactions are filled offline, signed in parallel across CPU cores,
+    spread over the issuing wallet pool, and confirmed from the shared
+    ledger stream.
+    
+    Args:
+        sha256_hex_strs: SHA-256 hashes of the documents (64 hex characters each)
+        meta: Optional metadata dictionary applied to every proof
+        
+    Returns:
+        Dictionary with per-hash results (in input order) and counts
+        
+    Example:
+        >>> xrpl_timestamp_batch(["a7ffc6f8...", "143862b7..."], {"serviceId": "passport-renewal"})
+        {
+            "results": [
+                {"sha256": "a7ffc6f8...", "txHash": "ABC123...", "ledgerIndex": 12345, ...},
+                {"sha256": "143862b7...", "txHash": "DEF456...", "ledgerIndex": 12345, ...}
+            ],
+            "validated": 2,
+            "failed": 0
+        }
+    """
+    max_batch = int(os.getenv("MCP_MAX_BATCH", "10000"))
+    if not sha256_hex_strs:
+        raise ValueError("At least one hash is required")
+    if len(sha256_hex_strs) > max_batch:
+        raise ValueError(f"Batch too large: {len(sha256_hex_strs)} hashes (max {max_batch})")
+    
+    # Admitted for the lookups that fill the batch; each submit then takes
+    # its own token, so reads are still admitted while the batch runs
+    return await scheduler.run(
+        "xrpl_timestamp_batch", record_proofs, sha256_hex_strs, meta,
+        scheduler.pacer(PRIORITY_WRITE), priority=PRIORITY_WRITE, cost=3
+    )
+
+
+@mcp.tool()
+@traced("tool.begin_document")
+@scheduler.schedule("begin_document", priority=PRIORITY_READ)
+def begin_document() -> dict:
+    """
+    Start a chunked document upload for hashing large files.
+    
+    Use this instead of sending a large PDF to `verify` as one Base64 string.
+    Send the document with `append_chunk`, then call `finish_document`.
+    
+    Returns:
+        Dictionary with session ID, expiry (seconds) and maximum document size
+        
+    Example:
+        >>> begin_document()
+        {
+            "sessionId": "Yt3k...",
+            "bytesReceived": 0,
+            "chunks": 0,
+            "expiresIn": 900,
+            "maxBytes": 536870912
+        }
+    """
+    return upload_sessions.begin()
+
+
+@mcp.tool()
+@traced("tool.append_chunk")
+@scheduler.schedule("append_chunk", priority=PRIORITY_READ)
+def append_chunk(session_id: str, chunk_b64: str, offset: Optional[int] = None) -> dict:
+    """
+    Append a Base64-encoded chunk to a document upload.
+    
+    Pass `offset` (bytes sent before this chunk) to make the upload resumable:
+    re-sending the last chunk after a transport error is safe, and a wrong
+    offset returns an error naming the offset to resume from.
+    
+    Args:
+        session_id: Session ID from `begin_document`
+        chunk_b64: Base64-encoded chunk (decoded chunks are hashed in order)
+        offset: Optional byte offset of this chunk in the document
+        
+    Returns:
+        Dictionary with bytes received, chunk count and expiry
+        
+    Example:
+        >>> append_chunk("Yt3k...", "JVBERi0xLjQK...", 0)
+        {
+            "sessionId": "Yt3k...",
+            "bytesReceived": 1048576,
+            "chunks": 1,
+            "expiresIn": 900
+        }
+    """
+    return upload_sessions.append(session_id, chunk_b64, offset)
+
+
+@mcp.tool()
+@traced("tool.finish_document")
+async def finish_document(session_id: str, action: str = "none", meta: Optional[dict] = None) -> dict:
+    """
+    Finish a chunked upload and return the document's SHA-256 digest.
+    
+    Optionally continue straight into verification or timestamping.
+    
+    Args:
+        session_id: Session ID from `begin_document`
+        action: "none" (digest only), "verify" or "timestamp"
+        meta: Optional metadata for "timestamp" (serviceId, caseId, etc.)
+        
+    Returns:
+        Dictionary with sha256, size, and the verify/timestamp result if
+        requested; if the follow-up fails, the digest is returned with an
+        "error" so it can be retried with `verify`/`xrpl_timestamp` directly
+        
+    Example:
+        >>> finish_document("Yt3k...", "verify")
+        {
+            "sha256": "a7ffc6f8...",
+            "bytes": 5242880,
+            "chunks": 5,
+            "verification": {"sha256": "a7ffc6f8...", "found": true, ...}
+        }
+    """
+    if action not in ("none", "verify", "timestamp"):
+        raise ValueError(f"Invalid action: {action} (expected none, verify or timestamp)")
+    
+    result = await scheduler.run("finish_document", upload_sessions.finish, session_id, priority=PRIORITY_READ)
+    
+    # Follow-up work is admitted under the same limits as the standalone tools.
+    # The session is gone by now, so a failure must not lose the digest.
+    try:
+        if action == "verify":
+            result["verification"] = await scheduler.run(
+                "verify", verify_hash, result["sha256"], priority=PRIORITY_READ
+            )
+        elif action == "timestamp":
+            result["timestamp"] = await scheduler.run(
+                "xrpl_timestamp", record_proof, result["sha256"], meta, priority=PRIORITY_WRITE
+            )
+    except Exception as e:
+        result["error"] = f"{action} failed: {str(e)}"
+    
+    return result
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Health check for load balancers (HTTP transports only)."""
+    return JSONResponse({
+        "status": "ok",
+        "initialized": xrpl_client is not None,
+        "scheduler": scheduler.stats()
+    })
+
+
 # Server entry point
+def rebuild_index(argv: List[str]):
+    """
+    Rebuild the proof store from ledger history (`python server.py rebuild-index`).
+    
+    Args:
+        argv: Command-line options after `rebuild-index`
+    """
+    from src.backfill import IndexRebuilder, parse_args
+    
+    args = parse_args(argv)
+    # Read-only: leave pending writes to the server that owns the outbox
+    initialize_clients(outbox=False)
+    
+    rebuilder = IndexRebuilder(
+        proof_verifier,
+        network_url=args.network or xrpl_client.network_url,
+        checkpoint_path=args.checkpoint,
+        connections=args.connections,
+        workers=args.workers,
+        shard_size=args.shard_size
+    )
+    stats = rebuilder.run(ledger_min=args.ledger_min, ledger_max=args.ledger_max)
+    
+    print(f"\n✅ Indexed {stats['indexed']} proof(s) from {stats['transactions']} transaction(s) "
+          f"({stats['completed']} shard(s) fetched, {stats['skipped']} already done)")
+    if stats["failed"]:
+        print(f"⚠️ {len(stats['failed'])} shard(s) failed; run the command again to resume")
+        sys.exit(1)
+
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["rebuild-index"]:
+        rebuild_index(sys.argv[2:])
+        sys.exit(0)
+    
+    # stdio (default): one server per agent process
+    # http / sse: one long-lived server shared by many concurrent MCP clients
+    transport = os.getenv("MCP_TRANSPORT", "stdio").lower()
+    
     print("=" * 60)
     print("🌟 XRPL Proof & Certificates MCP Server")
     print("=" * 60)
@@ -241,6 +683,28 @@ if __name__ == "__main__":
     print("  2. verify            - Verify document proof exists")
     print("  3. xrpl_mint_document_nft - Mint NFT certificate")
     print("  4. pay_fee           - Process payment (testnet)")
-    print("\n🚀 Starting server...\n")
+    print("  5. xrpl_timestamp_batch - Bulk timestamp with parallel signing")
+    print("  6. begin_document / append_chunk / finish_document - Chunked upload & hashing")
+    print("  7. search_proofs     - Find proofs by serviceId, caseId, time range")
+    print(f"\n🚀 Starting server ({transport})...\n")
     
-    mcp.run()
\ No newline at end of file
+    if transport == "stdio":
+        mcp.run()
+    elif transport in ("http", "streamable-http", "sse"):
+        # Connect up front so every client shares one warm XRPL client,
+        # verifier cache and submission pipeline
+        initialize_clients()
+        
+        run_kwargs = {
+            "transport": transport,
+            "host": os.getenv("MCP_HOST", "127.0.0.1"),
+            "port": int(os.getenv("MCP_PORT", "8000")),
+            "path": os.getenv("MCP_PATH", "/sse" if transport == "sse" else "/mcp"),
+        }
+        if transport != "sse":
+            # Stateless sessions let any replica behind a load balancer serve any request
+            run_kwargs["stateless_http"] = os.getenv("MCP_STATELESS_HTTP", "false").lower() in ("1", "true", "yes")
+        
+        mcp.run(**run_kwargs)
+    else:
+        raise ValueError(f"Unsupported MCP_TRANSPORT: {transport} (expected stdio, http or sse)")
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""
+Parallel history backfill for the proof store.
+
+Rebuilding the proof index from a single paged `account_tx` walk is bounded
+by one connection's round trips. The rebuilder instead splits the ledger
+range of every pool wallet into shards, fetches shards concurrently over
+several connections, decodes memos in a process pool and merges each shard
+into the verifier's store. Completed shards are checkpointed so an
+interrupted rebuild resumes where it stopped.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from xrpl.clients import WebsocketClient
+from xrpl.models.requests import AccountTx, ServerInfo
+
+from src.verification import ProofVerifier
+
+
+class Shard(NamedTuple):
+    """Ledger range of one account's history."""
+    account: str
+    ledger_min: int
+    ledger_max: int
+    
+    @property
+    def key(self) -> str:
+        return f"{self.account}:{self.ledger_min}-{self.ledger_max}"
+
+
+def plan_shards(accounts: List[str], ledger_min: int, ledger_max: int, shard_size: int) -> List[Shard]:
+    """
+    Split the ledger range of each account into shards.
+    
+    Args:
+        accounts: Addresses to backfill
+        ledger_min: First ledger to include
+        ledger_max: Last ledger to include
+        shard_size: Ledgers per shard
+    
+    Returns:
+        List of shards covering the range for every account
+    """
+    return [
+        Shard(account, start, min(start + shard_size - 1, ledger_max))
+        for account in accounts
+        for start in range(ledger_min, ledger_max + 1, shard_size)
+    ]
+
+
+def _decode_memos(transactions: List[dict]) -> List[Optional[dict]]:
+    """Decode the proof memos of a shard (runs in a worker process)."""
+    return [ProofVerifier.parse_memo_from_transaction(tx) for tx in transactions]
+
+
+class Checkpoint:
+    """JSON record of completed shards for one rebuild plan."""
+    
+    def __init__(self, path: str):
+        """
+        Load a checkpoint, if one exists.
+        
+        Args:
+            path: Checkpoint file
+        """
+        self.path = path
+        self.plan: Dict[str, Any] = {}
+        self.done: Set[str] = set()
+        
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.plan = state.get("plan", {})
+            self.done = set(state.get("done", []))
+    
+    def reset(self, plan: Dict[str, Any]):
+        """Start a new plan, discarding completed shards of any other plan."""
+        self.plan = plan
+        self.done = set()
+        self._save()
+    
+    def mark_done(self, shard: Shard):
+        """Record a shard whose proofs have been merged into the store."""
+        self.done.add(shard.key)
+        self._save()
+    
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Write then rename, so a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"plan": self.plan, "done": sorted(self.done)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class IndexRebuilder:
+    """Backfills a verifier's proof store from ledger history."""
+    
+    def __init__(
+        self,
+        verifier: ProofVerifier,
+        network_url: str,
+        checkpoint_path: str,
+        connections: int = 4,
+        workers: Optional[int] = None,
+        shard_size: int = 100000,
+        page_limit: int = 400
+    ):
+        """
+        Initialize index rebuilder.
+        
+        Args:
+            verifier: Verifier whose index and store receive the proofs
+            network_url: WebSocket URL of an XRPL node with the history to scan
+            checkpoint_path: File recording completed shards
+            connections: Number of concurrent node connections
+            workers: Number of memo decoding processes (defaults to the CPU count)
+            shard_size: Ledgers per shard
+            page_limit: Transactions per `account_tx` page
+        """
+        self.verifier = verifier
+        self.network_url = network_url
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.connections = connections
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.page_limit = page_limit
+        self._local = threading.local()
+        self._clients: List[WebsocketClient] = []
+        self._clients_lock = threading.Lock()
+    
+    def _client(self) -> WebsocketClient:
+        # One connection per fetch thread
+        client = getattr(self._local, "client", None)
+        if client is None or not client.is_open():
+            client = WebsocketClient(self.network_url)
+            client.open()
+            self._local.client = client
+            with self._clients_lock:
+                self._clients.append(client)
+        return client
+    
+    def ledger_bounds(self) -> Tuple[int, int]:
+        """
+        Ledger range available on the node.
+        
+        Returns:
+            (first, last) ledger of the node's most recent complete range
+        """
+        response = self._client().request(ServerInfo())
+        if not response.is_successful():
+            raise Exception(f"Failed to query server info: {response.result}")
+        
+        complete = response.result["info"].get("complete_ledgers", "")
+        if not complete or complete == "empty":
+            raise Exception("Node has no complete ledgers")
+        
+        first, _, last = complete.split(",")[-1].partition("-")
+        return int(first), int(last or first)
+    
+    def fetch_shard(self, shard: Shard) -> List[dict]:
+        """
+        Fetch every transaction of an account within a shard.
+        
+        Args:
+            shard: Account and ledger range to fetch
+        
+        Returns:
+            List of transaction dictionaries, oldest first
+        """
+        client = self._client()
+        transactions = []
+        marker = None
+        
+        while True:
+            response = client.request(AccountTx(
+                account=shard.account,
+                ledger_index_min=shard.ledger_min,
+                ledger_index_max=shard.ledger_max,
+                forward=True,
+                limit=self.page_limit,
+                marker=marker
+            ))
+            if not response.is_successful():
+                raise Exception(f"Failed to fetch {shard.key}: {response.result}")
+            
+            transactions.extend(response.result.get("transactions", []))
+            marker = response.result.get("marker")
+            if marker is None:
+                return transactions
+    
+    def run(self, ledger_min: Optional[int] = None, ledger_max: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Rebuild the proof store, resuming from the checkpoint if possible.
+        
+        Args:
+            ledger_min: First ledger to scan (defaults to the unfinished checkpoint,
+                the ledger after a finished one, or the node range)
+            ledger_max: Last ledger to scan (defaults to the checkpoint or node range)
+        
+        Returns:
+            Dictionary with the ledger range, shard counts and proofs indexed
+        """
+        accounts = sorted(self.verifier.client.wallet_pool.addresses)
+        plan = self.checkpoint.plan
+        
+        finished = bool(plan) and all(
+            shard.key in self.checkpoint.done
+            for shard in plan_shards(plan["accounts"], plan["ledgerMin"], plan["ledgerMax"], plan["shardSize"])
+        )
+        
+        # Resume an unfinished checkpointed plan unless a different one was asked for
+        resumable = (
+            not finished
+            and plan.get("accounts") == accounts
+            and plan.get("shardSize") == self.shard_size
+            and ledger_min in (None, plan.get("ledgerMin"))
+            and ledger_max in (None, plan.get("ledgerMax"))
+        )
+        if not resumable:
+            # After a finished rebuild of the same wallets only newer ledgers are missing
+            if finished and plan.get("accounts") == accounts and ledger_min is None:
+                ledger_min = plan["ledgerMax"] + 1
+            if ledger_min is None or ledger_max is None:
+                node_min, node_max = self.ledger_bounds()
+                ledger_min = node_min if ledger_min is None else ledger_min
+                ledger_max = node_max if ledger_max is None else ledger_max
+            self.checkpoint.reset({
+                "accounts": accounts,
+                "ledgerMin": ledger_min,
+                "ledgerMax": ledger_max,
+                "shardSize": self.shard_size
+            })
+            plan = self.checkpoint.plan
+        
+        shards = plan_shards(accounts, plan["ledgerMin"], plan["ledgerMax"], self.shard_size)
+        pending = [shard for shard in shards if shard.key not in self.checkpoint.done]
+        print(f"🔁 Rebuilding proof index: ledgers {plan['ledgerMin']}-{plan['ledgerMax']}, "
+              f"{len(pending)}/{len(shards)} shard(s) to fetch")
+        
+        stats = {
+            "ledgerMin": plan["ledgerMin"],
+            "ledgerMax": plan["ledgerMax"],
+            "shards": len(shards),
+            "skipped": len(shards) - len(pending),
+            "completed": 0,
+            "failed": [],
+            "transactions": 0,
+            "indexed": 0
+        }
+        
+        fetch_pool = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="backfill-fetch")
+        # Spawn, so workers do not inherit the websocket threads of this process
+        decode_pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        
+        try:
+            in_flight = {fetch_pool.submit(self.fetch_shard, shard): (shard, None) for shard in pending}
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    shard, transactions = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        stats["failed"].append({"shard": shard.key, "error": str(e)})
+                        print(f"⚠️ Shard {shard.key} failed: {str(e)}")
+                        continue
+                    
+                    if transactions is None:
+                        # Fetched: decode memos off the fetch threads and this process
+                        in_flight[decode_pool.submit(_decode_memos, result)] = (shard, result)
+                        continue
+                    
+                    # Decoded: merge, then checkpoint once the proofs are stored
+                    stats["indexed"] += self.verifier.index_memos(zip(transactions, result))
+                    stats["transactions"] += len(transactions)
+                    stats["completed"] += 1
+                    self.checkpoint.mark_done(shard)
+                    print(f"   ✓ {shard.key}: {len(transactions)} transaction(s)")
+        finally:
+            fetch_pool.shutdown(cancel_futures=True)
+            decode_pool.shutdown(cancel_futures=True)
+            with self._clients_lock:
+                for client in self._clients:
+                    if client.is_open():
+                        client.close()
+                self._clients.clear()
+        
+        return stats
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """
+    Parse `rebuild-index` command-line options.
+    
+    Args:
+        argv: Arguments after the command name
+    
+    Returns:
+        Parsed options
+    """
+    parser = argparse.ArgumentParser(
+        prog="server.py rebuild-index",
+        description="Rebuild the proof store from the ledger history of every pool wallet."
+    )
+    parser.add_argument("--ledger-min", type=int, help="First ledger to scan (default: node's oldest)")
+    parser.add_argument("--ledger-max", type=int, help="Last ledger to scan (default: latest validated)")
+    parser.add_argument("--shard-size", type=int, default=100000, help="Ledgers per shard")
+    parser.add_argument("--connections", type=int, default=4, help="Concurrent node connections")
+    parser.add_argument("--workers", type=int, help="Memo decoding processes (default: CPU count)")
+    parser.add_argument(
+        "--checkpoint",
+        default=os.getenv("XRPL_REBUILD_CHECKPOINT", ".cache/rebuild_index.json"),
+        help="Progress file used to resume an interrupted rebuild"
+    )
+    parser.add_argument("--network", help="Node to scan, e.g. a full-history server (default: XRPL_NETWORK)")
+    return parser.parse_args(argv)
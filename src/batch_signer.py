@@ -0,0 +1,120 @@
+"""
+Parallel offline signing for bulk submissions.
+
+secp256k1/ed25519 signing and binary encoding are CPU-bound, so signing
+thousands of transactions one by one on the calling thread does not scale.
+BatchSigner signs already-filled transactions across a process pool and
+returns the signed blobs for submission.
+"""
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from xrpl.core.binarycodec import encode
+from xrpl.models.transactions import Transaction
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+
+def _sign_chunk(public_key: str, private_key: str, tx_dicts: List[dict]) -> List[Tuple[str, str]]:
+    """
+    Sign a chunk of filled transactions (runs in a worker process).
+    
+    Args:
+        public_key: Signing wallet public key
+        private_key: Signing wallet private key
+        tx_dicts: Filled transactions in XRPL JSON format
+    
+    Returns:
+        List of (tx_blob, tx_hash) in input order
+    """
+    wallet = Wallet(public_key, private_key)
+    signed_blobs = []
+    
+    for tx_dict in tx_dicts:
+        signed = sign(Transaction.from_xrpl(tx_dict), wallet)
+        signed_blobs.append((encode(signed.to_xrpl()), signed.get_hash()))
+    
+    return signed_blobs
+
+
+class BatchSigner:
+    """Signs batches of transactions across a process pool."""
+    
+    def __init__(self, workers: Optional[int] = None, inline_threshold: int = 64):
+        """
+        Initialize batch signer.
+        
+        Args:
+            workers: Number of worker processes (defaults to the CPU count)
+            inline_threshold: Batches smaller than this are signed in-process
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_threshold = inline_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn, so workers do not inherit the websocket threads of this process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    def sign(self, wallet: Wallet, tx_dicts: List[dict]) -> List[Tuple[str, str]]:
+        """
+        Sign filled transactions for one wallet.
+        
+        Args:
+            wallet: Wallet to sign with
+            tx_dicts: Filled transactions (Sequence, Fee, LastLedgerSequence set)
+        
+        Returns:
+            List of (tx_blob, tx_hash) in input order
+        """
+        return self.sign_batches([(wallet, tx_dicts)])[0]
+    
+    def sign_batches(self, batches: List[Tuple[Wallet, List[dict]]]) -> List[List[Tuple[str, str]]]:
+        """
+        Sign filled transactions for several wallets at once.
+        
+        Args:
+            batches: List of (wallet, filled transactions) pairs
+        
+        Returns:
+            For each batch, a list of (tx_blob, tx_hash) in input order
+        """
+        total = sum(len(tx_dicts) for _, tx_dicts in batches)
+        
+        if total < self.inline_threshold or self.workers == 1:
+            return [
+                _sign_chunk(wallet.public_key, wallet.private_key, tx_dicts)
+                for wallet, tx_dicts in batches
+            ]
+        
+        # A few chunks per worker keeps all cores busy without per-item overhead
+        chunk_size = math.ceil(total / (self.workers * 4))
+        
+        batch_futures = []
+        for wallet, tx_dicts in batches:
+            batch_futures.append([
+                self._pool().submit(_sign_chunk, wallet.public_key, wallet.private_key, tx_dicts[i:i + chunk_size])
+                for i in range(0, len(tx_dicts), chunk_size)
+            ])
+        
+        results = []
+        for futures in batch_futures:
+            signed_blobs = []
+            for future in futures:
+                signed_blobs.extend(future.result())
+            results.append(signed_blobs)
+        return results
+    
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,259 @@
+"""
+Shared ledger-close confirmation tracker.
+
+`submit_and_wait` polls the node separately for every transaction until it
+validates or expires, so N transactions in flight mean N polling loops. The
+tracker instead keeps one subscription to the `ledger` stream and to the pool
+accounts' transactions, and resolves every waiting submission from that
+single stream.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+from xrpl.clients import WebsocketClient
+from xrpl.models.requests import Subscribe, StreamParameter, Tx
+from xrpl.transaction import XRPLReliableSubmissionException
+
+
+class TransactionExpired(XRPLReliableSubmissionException):
+    """Raised when a transaction was not validated before its LastLedgerSequence."""
+
+
+class ConfirmationTracker:
+    """Resolves pending transactions from one ledger/transaction subscription."""
+    
+    def __init__(self, network_url: str, accounts: List[str]):
+        """
+        Initialize confirmation tracker.
+        
+        Args:
+            network_url: WebSocket URL for XRPL network
+            accounts: Addresses whose transactions are tracked
+        """
+        self.network_url = network_url
+        self.accounts = list(accounts)
+        self.validated_ledger: Optional[int] = None
+        
+        # tx hash -> (signing ledger, LastLedgerSequence, future resolved with the validated result)
+        self._pending: Dict[str, Tuple[Optional[int], Optional[int], Future]] = {}
+        self._lock = threading.Lock()
+        self._client: Optional[WebsocketClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+    
+    def start(self, timeout: float = 10.0):
+        """
+        Start the subscription thread if it is not running.
+        
+        Args:
+            timeout: Seconds to wait for the subscription to be established
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="xrpl-confirmations", daemon=True)
+                self._thread.start()
+        
+        if not self._ready.wait(timeout):
+            raise Exception("Timed out subscribing to ledger stream")
+    
+    def stop(self):
+        """Stop the subscription thread."""
+        self._stopped.set()
+        client = self._client
+        if client is not None and client.is_open():
+            client.close()
+    
+    def track(self, tx_hash: str, last_ledger_sequence: Optional[int],
+              min_ledger: Optional[int] = None) -> Future:
+        """
+        Register a transaction before it is submitted.
+        
+        A transaction is only reported expired once the node confirms it
+        searched every ledger from `min_ledger` through its LastLedgerSequence,
+        so without `min_ledger` it stays pending until it is seen validated.
+        
+        Args:
+            tx_hash: Hash of the signed transaction
+            last_ledger_sequence: Ledger after which the transaction expires
+            min_ledger: Validated ledger before the transaction was first submitted
+        
+        Returns:
+            Future resolved with the validated transaction result
+        """
+        future: Future = Future()
+        with self._lock:
+            self._pending[tx_hash.upper()] = (min_ledger, last_ledger_sequence, future)
+        return future
+    
+    def forget(self, tx_hash: str):
+        """
+        Stop tracking a transaction (e.g. it was rejected on submission).
+        
+        Args:
+            tx_hash: Hash of the signed transaction
+        """
+        with self._lock:
+            self._pending.pop(tx_hash.upper(), None)
+    
+    def check(self, client: WebsocketClient, tx_hash: str) -> bool:
+        """
+        Resolve a tracked transaction now if it has already been validated.
+        
+        Used when a transaction may have validated while nobody was listening,
+        e.g. one signed before a restart.
+        
+        Args:
+            client: Connected client to look the transaction up with
+            tx_hash: Hash of the tracked transaction
+        
+        Returns:
+            True if the transaction was found validated
+        """
+        return self._lookup(client, tx_hash) is True
+    
+    def pending_count(self) -> int:
+        """Number of transactions waiting for validation."""
+        with self._lock:
+            return len(self._pending)
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                with WebsocketClient(self.network_url) as client:
+                    self._client = client
+                    response = client.request(Subscribe(
+                        streams=[StreamParameter.LEDGER],
+                        accounts=self.accounts
+                    ))
+                    if not response.is_successful():
+                        raise Exception(f"Subscribe failed: {response.result}")
+                    
+                    self.validated_ledger = response.result.get("ledger_index")
+                    self._ready.set()
+                    # Anything that validated while we were disconnected
+                    self._reconcile(client)
+                    
+                    for message in client:
+                        if self._stopped.is_set():
+                            break
+                        self._handle_message(client, message)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    print(f"⚠️ Confirmation tracker disconnected: {str(e)}")
+            finally:
+                self._client = None
+                self._ready.clear()
+            
+            # Back off before reconnecting
+            self._stopped.wait(1.0)
+    
+    def _handle_message(self, client: WebsocketClient, message: Dict[str, Any]):
+        message_type = message.get("type")
+        
+        if message_type == "transaction" and message.get("validated"):
+            tx_json = message.get("tx_json") or message.get("transaction") or {}
+            tx_hash = message.get("hash") or tx_json.get("hash")
+            if tx_hash:
+                self._resolve(tx_hash, self._normalize(message, tx_json, tx_hash))
+        
+        elif message_type == "ledgerClosed":
+            ledger_index = message.get("ledger_index")
+            self.validated_ledger = ledger_index
+            
+            # Transactions of earlier ledgers have already been published, so
+            # anything still pending past its LastLedgerSequence has expired
+            with self._lock:
+                expired = [
+                    tx_hash for tx_hash, (_, last_ledger, _) in self._pending.items()
+                    if last_ledger is not None and last_ledger < ledger_index
+                ]
+            
+            for tx_hash in expired:
+                # Double-check in case a stream message was missed. Anything short
+                # of a complete search stays pending and is looked up again on the
+                # next close, since reporting a validated transaction as expired
+                # would get it signed and applied twice.
+                if self._lookup(client, tx_hash) is False:
+                    self._fail(tx_hash, TransactionExpired(
+                        f"Transaction {tx_hash} expired: ledger {ledger_index} is past its LastLedgerSequence"
+                    ))
+    
+    def _reconcile(self, client: WebsocketClient):
+        with self._lock:
+            pending = list(self._pending)
+        for tx_hash in pending:
+            self._lookup(client, tx_hash)
+    
+    def _lookup(self, client: WebsocketClient, tx_hash: str) -> Optional[bool]:
+        """
+        Resolve a pending transaction from a `tx` lookup.
+        
+        Returns:
+            True if it was validated, False if the node searched its whole
+            ledger range without finding it, None if that is not known
+        """
+        with self._lock:
+            entry = self._pending.get(tx_hash.upper())
+        min_ledger, last_ledger, _ = entry if entry is not None else (None, None, None)
+        
+        request = Tx(transaction=tx_hash)
+        if min_ledger is not None and last_ledger is not None:
+            request = Tx(transaction=tx_hash, min_ledger=min_ledger, max_ledger=last_ledger)
+        
+        try:
+            response = client.request(request)
+        except Exception:
+            return None
+        
+        result = response.result
+        if not response.is_successful():
+            # Only an exhaustive search of the range proves it never validated
+            if result.get("error") == "txnNotFound" and result.get("searched_all") is True:
+                return False
+            return None
+        if not result.get("validated"):
+            return None
+        
+        tx_json = result.get("tx_json") or result
+        self._resolve(tx_hash, self._normalize(result, tx_json, tx_hash))
+        return True
+    
+    @staticmethod
+    def _normalize(message: Dict[str, Any], tx_json: Dict[str, Any], tx_hash: str) -> Dict[str, Any]:
+        """Shape a stream message or `tx` result like a submit-and-wait result."""
+        result = dict(tx_json)
+        result.update({
+            "hash": tx_hash,
+            "ledger_index": message.get("ledger_index"),
+            "meta": message.get("meta", {}),
+            "validated": True
+        })
+        if message.get("close_time_iso"):
+            result["close_time_iso"] = message["close_time_iso"]
+        if "tx_json" in message:
+            result["tx_json"] = message["tx_json"]
+        return result
+    
+    def _resolve(self, tx_hash: str, result: Dict[str, Any]):
+        with self._lock:
+            entry = self._pending.pop(tx_hash.upper(), None)
+        if entry is None:
+            return
+        
+        future = entry[2]
+        engine_result = result["meta"].get("TransactionResult")
+        if engine_result != "tesSUCCESS":
+            future.set_exception(XRPLReliableSubmissionException(
+                f"Transaction failed: {engine_result}"
+            ))
+        else:
+            future.set_result(result)
+    
+    def _fail(self, tx_hash: str, error: Exception):
+        with self._lock:
+            entry = self._pending.pop(tx_hash.upper(), None)
+        if entry is not None:
+            entry[2].set_exception(error)
@@ -0,0 +1,440 @@
+"""
+Memory-mapped table of anchored document digests.
+
+A Python dict of hex strings to match dicts costs gigabytes for millions of
+proofs and must be rebuilt at every start. The digest table instead keeps
+fixed-width records in files that every server process maps from the page
+cache:
+
+    digests.base    header + records sorted by digest (memory-mapped)
+    digests.delta   recent records, append-only and unsorted
+    txhashes.heap   raw 32-byte transaction hashes referenced by offset
+
+Each record is a 32-byte digest, the ledger index, the close time and the
+offset of the anchoring transaction hash in the heap. Lookups interpolate
+over the uniformly distributed digests; appends go to the delta, which a
+background thread merges into a new base, swapped in atomically, once it
+grows large.
+"""
+
+import io
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# digest, ledger index, close time (Unix seconds), tx hash offset in the heap
+RECORD = struct.Struct("<32sIIQ")
+# magic, format version, record count
+HEADER = struct.Struct("<4sIQ")
+MAGIC = b"DGT1"
+VERSION = 1
+
+# (ledger index, close time, tx hash offset)
+Entry = Tuple[int, int, int]
+
+
+class DigestTable:
+    """Sorted, memory-mapped digest index with an append-only delta segment."""
+    
+    def __init__(self, path: Optional[str] = None, merge_threshold: int = 65536):
+        """
+        Open (or create) a digest table.
+        
+        Args:
+            path: Directory holding the table files (None for a memory-only table)
+            merge_threshold: Delta records that trigger a background merge into the base
+        """
+        self.path = path
+        self.merge_threshold = merge_threshold
+        self._lock = threading.RLock()
+        # One merge at a time; lookups and appends continue while it runs
+        self._merge_lock = threading.Lock()
+        self._merge_requested = threading.Event()
+        self._merge_thread: Optional[threading.Thread] = None
+        
+        # Base segment: header followed by sorted records (mmap or bytes)
+        self._base = HEADER.pack(MAGIC, VERSION, 0)
+        self._base_count = 0
+        self._base_id = None
+        # Delta segment, parsed into memory (it stays small)
+        self._delta: Dict[bytes, Entry] = {}
+        # Delta digests missing from the base, so len() counts each digest once
+        self._delta_new = 0
+        self._delta_id = None
+        self._delta_offset = 0
+        # Memory-only transaction hash heap
+        self._heap = bytearray()
+        self._heap_fd: Optional[int] = None
+        self._lock_file = None
+        self._merge_lock_file = None
+        
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._base_path = os.path.join(path, "digests.base")
+            self._delta_path = os.path.join(path, "digests.delta")
+            self._heap_path = os.path.join(path, "txhashes.heap")
+            self._lock_file = open(os.path.join(path, "digests.lock"), "a")
+            self._merge_lock_file = open(os.path.join(path, "digests.merge.lock"), "a")
+            self._refresh()
+    
+    @contextmanager
+    def _exclusive(self, lock_file=None):
+        # Serializes writers (or mergers) across processes; readers never block
+        if self.path is None or fcntl is None:
+            yield
+            return
+        lock_file = lock_file or self._lock_file
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+    
+    def _refresh(self):
+        """Pick up merges and appends made by any process."""
+        st = self._stat(self._base_path)
+        base_id = (st.st_dev, st.st_ino) if st else None
+        base_changed = base_id != self._base_id
+        if base_changed:
+            self._map_base()
+            self._base_id = base_id
+        
+        st = self._stat(self._delta_path)
+        delta_id = (st.st_dev, st.st_ino) if st else None
+        if delta_id != self._delta_id:
+            # Replaced by a merge: its records are in the new base
+            self._delta = {}
+            self._delta_new = 0
+            self._delta_offset = 0
+            self._delta_id = delta_id
+        elif base_changed and self._delta:
+            # Caught a merge before its delta was replaced; some records are in the new base
+            self._delta_new = sum(1 for digest in self._delta if self._search_base(digest) < 0)
+        
+        if st is not None and st.st_size - self._delta_offset >= RECORD.size:
+            with open(self._delta_path, "rb") as f:
+                f.seek(self._delta_offset)
+                data = f.read()
+            # Only whole records; a concurrent append may be half written
+            usable = len(data) - len(data) % RECORD.size
+            for digest, ledger_index, close_time, offset in RECORD.iter_unpack(data[:usable]):
+                self._put_delta(digest, (ledger_index, close_time, offset))
+            self._delta_offset += usable
+    
+    def _map_base(self):
+        import mmap
+        
+        if isinstance(self._base, mmap.mmap):
+            self._base.close()
+        self._base = HEADER.pack(MAGIC, VERSION, 0)
+        self._base_count = 0
+        
+        if not os.path.exists(self._base_path):
+            return
+        with open(self._base_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= HEADER.size:
+                return
+            # The mapping outlives the file handle and a later replace of the file
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            raise ValueError(f"Not a version {VERSION} digest table: {self._base_path}")
+        self._base = mapped
+        self._base_count = count
+    
+    def _put_delta(self, digest: bytes, entry: Entry):
+        existing = self._delta.get(digest)
+        if existing is None and self._search_base(digest) < 0:
+            self._delta_new += 1
+        if existing is None or entry[0] < existing[0]:
+            self._delta[digest] = entry
+    
+    def _digest_at(self, index: int) -> bytes:
+        offset = HEADER.size + index * RECORD.size
+        return self._base[offset:offset + 32]
+    
+    def _search_base(self, digest: bytes) -> int:
+        """Index of a digest in the base, or -1 (interpolation search)."""
+        lo, hi = 0, self._base_count - 1
+        target = int.from_bytes(digest[:8], "big")
+        probes = 0
+        
+        while lo <= hi:
+            lo_digest, hi_digest = self._digest_at(lo), self._digest_at(hi)
+            if digest < lo_digest or digest > hi_digest:
+                return -1
+            
+            lo_key = int.from_bytes(lo_digest[:8], "big")
+            hi_key = int.from_bytes(hi_digest[:8], "big")
+            # Uniform digests need ~log log n probes; bisect if keys turn out skewed
+            if probes >= 8 or hi_key == lo_key:
+                mid = (lo + hi) // 2
+            else:
+                mid = lo + (target - lo_key) * (hi - lo) // (hi_key - lo_key)
+            probes += 1
+            
+            mid_digest = self._digest_at(mid)
+            if mid_digest == digest:
+                return mid
+            if mid_digest < digest:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        
+        return -1
+    
+    def _lower_bound(self, digest: bytes, lo: int = 0) -> int:
+        """First base index whose digest is not below `digest`."""
+        hi = self._base_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._digest_at(mid) < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def _find(self, digest: bytes) -> Optional[Entry]:
+        entry = self._delta.get(digest)
+        index = self._search_base(digest)
+        if index >= 0:
+            _, ledger_index, close_time, offset = RECORD.unpack_from(
+                self._base, HEADER.size + index * RECORD.size
+            )
+            if entry is None or ledger_index <= entry[0]:
+                entry = (ledger_index, close_time, offset)
+        return entry
+    
+    def _read_tx_hash(self, offset: int) -> str:
+        if self.path is None:
+            return bytes(self._heap[offset:offset + 32]).hex().upper()
+        if self._heap_fd is None:
+            self._heap_fd = os.open(self._heap_path, os.O_RDONLY)
+        return os.pread(self._heap_fd, 32, offset).hex().upper()
+    
+    def get(self, sha256_hash: str) -> Optional[Tuple[int, int, str]]:
+        """
+        Look up the earliest anchor of a digest.
+        
+        Args:
+            sha256_hash: SHA-256 hash as 64 hex characters
+        
+        Returns:
+            (ledger index, close time in Unix seconds, transaction hash) or None
+        """
+        try:
+            digest = bytes.fromhex(sha256_hash)
+        except ValueError:
+            return None
+        if len(digest) != 32:
+            return None
+        
+        with self._lock:
+            if self.path is not None:
+                self._refresh()
+            entry = self._find(digest)
+            if entry is None:
+                return None
+            ledger_index, close_time, offset = entry
+            return ledger_index, close_time, self._read_tx_hash(offset)
+    
+    def add_many(self, anchors: Iterable[Tuple[str, int, int, str]]) -> int:
+        """
+        Add anchors, keeping the earliest one for digests seen twice.
+        
+        Args:
+            anchors: Iterable of (sha256 hex, ledger index, close time, tx hash hex)
+        
+        Returns:
+            Number of records written
+        """
+        rows = []
+        for sha256_hash, ledger_index, close_time, tx_hash in anchors:
+            try:
+                digest, tx_digest = bytes.fromhex(sha256_hash), bytes.fromhex(tx_hash)
+            except (TypeError, ValueError):
+                continue
+            if len(digest) == 32 and len(tx_digest) == 32:
+                rows.append((digest, ledger_index or 0, close_time or 0, tx_digest))
+        
+        with self._lock, self._exclusive():
+            if self.path is not None:
+                self._refresh()
+            
+            pending: Dict[bytes, Tuple[int, int, bytes]] = {}
+            for digest, ledger_index, close_time, tx_digest in rows:
+                existing = pending.get(digest) or self._find(digest)
+                if existing is None or ledger_index < existing[0]:
+                    pending[digest] = (ledger_index, close_time, tx_digest)
+            if not pending:
+                return 0
+            
+            heap_offset = self._append_heap(b"".join(tx_digest for _, _, tx_digest in pending.values()))
+            records = []
+            for i, (digest, (ledger_index, close_time, _)) in enumerate(pending.items()):
+                entry = (ledger_index, close_time, heap_offset + i * 32)
+                records.append(RECORD.pack(digest, *entry))
+                self._put_delta(digest, entry)
+            
+            if self.path is not None:
+                # Heap first, so readers never see a record pointing past it
+                with open(self._delta_path, "ab") as f:
+                    if f.tell() != self._delta_offset:
+                        # Drop a record torn by a writer that crashed mid-append
+                        f.truncate(self._delta_offset)
+                    f.write(b"".join(records))
+                    st = os.fstat(f.fileno())
+                self._delta_id = (st.st_dev, st.st_ino)
+                self._delta_offset += len(records) * RECORD.size
+            
+            if len(self._delta) >= self.merge_threshold:
+                self._request_merge()
+            
+            return len(records)
+    
+    def _append_heap(self, data: bytes) -> int:
+        if self.path is None:
+            offset = len(self._heap)
+            self._heap.extend(data)
+            return offset
+        
+        with open(self._heap_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset
+    
+    def _request_merge(self):
+        self._merge_requested.set()
+        if self._merge_thread is None or not self._merge_thread.is_alive():
+            self._merge_thread = threading.Thread(target=self._run_merges, name="digest-merge", daemon=True)
+            self._merge_thread.start()
+    
+    def _run_merges(self):
+        while self._merge_requested.wait(60.0):
+            self._merge_requested.clear()
+            try:
+                self.merge()
+            except Exception as e:
+                print(f"⚠️ Digest table merge failed: {str(e)}")
+    
+    def merge(self):
+        """
+        Merge the delta segment into a new sorted base.
+        
+        The new base is written from a snapshot of the delta while lookups and
+        appends carry on; only the final swap holds the writer lock. Records
+        appended meanwhile stay in the (new) delta.
+        """
+        with self._merge_lock, self._exclusive(self._merge_lock_file):
+            with self._lock:
+                if self.path is not None:
+                    self._refresh()
+                delta = dict(self._delta)
+            if not delta:
+                return
+            
+            if self.path is None:
+                out = io.BytesIO()
+                count = self._write_merged(out, delta)
+                with self._lock:
+                    self._base = out.getvalue()
+                    self._base_count = count
+                    self._delta = {digest: entry for digest, entry in self._delta.items()
+                                   if delta.get(digest) != entry}
+                    self._delta_new = sum(1 for digest in self._delta if self._search_base(digest) < 0)
+                return
+            
+            tmp_path = f"{self._base_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                self._write_merged(f, delta)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            with self._lock, self._exclusive():
+                self._refresh()
+                appended = b"".join(
+                    RECORD.pack(digest, *entry) for digest, entry in self._delta.items()
+                    if delta.get(digest) != entry
+                )
+                with open(f"{self._delta_path}.tmp", "wb") as f:
+                    f.write(appended)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                # Readers between the two replaces see a record in both, which lookups allow.
+                # A fresh (new inode) delta tells other processes to drop theirs.
+                os.replace(tmp_path, self._base_path)
+                os.replace(f"{self._delta_path}.tmp", self._delta_path)
+                self._refresh()
+    
+    def _write_merged(self, out: BinaryIO, delta: Dict[bytes, Entry]) -> int:
+        """Write the base with `delta` spliced in; returns the record count."""
+        # Base ranges go straight from the mapping to `out`, so a merge needs
+        # no memory beyond the delta itself
+        out.write(HEADER.pack(MAGIC, VERSION, 0))
+        count = 0
+        position = 0
+        
+        with memoryview(self._base) as base:
+            for digest in sorted(delta):
+                entry = delta[digest]
+                index = self._lower_bound(digest, position)
+                out.write(base[HEADER.size + position * RECORD.size:HEADER.size + index * RECORD.size])
+                count += index - position
+                position = index
+                
+                if index < self._base_count and self._digest_at(index) == digest:
+                    _, ledger_index, close_time, offset = RECORD.unpack_from(
+                        self._base, HEADER.size + index * RECORD.size
+                    )
+                    if ledger_index <= entry[0]:
+                        entry = (ledger_index, close_time, offset)
+                    position += 1
+                
+                out.write(RECORD.pack(digest, *entry))
+                count += 1
+            
+            out.write(base[HEADER.size + position * RECORD.size:HEADER.size + self._base_count * RECORD.size])
+            count += self._base_count - position
+        
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, count))
+        out.seek(0, io.SEEK_END)
+        return count
+    
+    def __len__(self) -> int:
+        with self._lock:
+            if self.path is not None:
+                self._refresh()
+            return self._base_count + self._delta_new
+    
+    def close(self):
+        """Unmap the table and close its files (after a running merge)."""
+        with self._merge_lock, self._lock:
+            if self.path is None:
+                return
+            if not isinstance(self._base, bytes):
+                self._base.close()
+            if self._heap_fd is not None:
+                os.close(self._heap_fd)
+                self._heap_fd = None
+            self._lock_file.close()
+            self._merge_lock_file.close()
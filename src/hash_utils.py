@@ -23,6 +23,25 @@ def compute_sha256_from_bytes(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def decode_b64(b64_string: str) -> bytes:
+    """
+    Decode a Base64 string, ignoring surrounding whitespace and line breaks.
+    
+    Args:
+        b64_string: Base64-encoded data
+        
+    Returns:
+        Decoded bytes
+        
+    Raises:
+        binascii.Error: If the data is not valid Base64
+    """
+    # Remove any whitespace or newlines
+    b64_clean = b64_string.strip().replace('\n', '').replace('\r', '')
+    
+    return base64.b64decode(b64_clean)
+
+
 def compute_sha256_from_b64(b64_string: str) -> str:
     """
     Decode Base64 string and compute SHA-256 hash.
@@ -37,11 +56,8 @@ def compute_sha256_from_b64(b64_string: str) -> str:
         ValueError: If Base64 decoding fails
     """
     try:
-        # Remove any whitespace or newlines
-        b64_clean = b64_string.strip().replace('\n', '').replace('\r', '')
-        
         # Decode Base64
-        decoded_data = base64.b64decode(b64_clean)
+        decoded_data = decode_b64(b64_string)
         
         # Compute hash
         return compute_sha256_from_bytes(decoded_data)
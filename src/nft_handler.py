@@ -2,28 +2,35 @@
 NFT Handler for minting document certificates on XRPL.
 """
 
-import json
 from typing import Dict, Any
 from xrpl.models.transactions import NFTokenMint
-from xrpl.transaction import submit_and_wait
-from xrpl.utils import str_to_hex
+
+from src.nft_uri import MAX_URI_BYTES, decode_uri, encode_compact, encode_legacy
+from src.tracing import span
 
 
 class NFTHandler:
     """Handler for XRPL NFT operations."""
     
-    def __init__(self, xrpl_client):
+    def __init__(self, xrpl_client, uri_format: str = "compact", compress: bool = True):
         """
         Initialize NFT handler.
         
         Args:
             xrpl_client: Instance of XRPLClient
+            uri_format: "compact" (versioned binary form) or "legacy" (plain JSON)
+            compress: Deflate compact URIs with the preset dictionary
         """
+        if uri_format not in ("compact", "legacy"):
+            raise ValueError(f"Unknown NFT URI format: {uri_format} (expected compact or legacy)")
+        
         self.client = xrpl_client
+        self.uri_format = uri_format
+        self.compress = compress
     
     def encode_nft_uri(self, data: dict) -> str:
         """
-        Encode metadata into compact JSON for NFT URI.
+        Encode metadata for an NFT URI.
         
         Args:
             data: Dictionary with NFT metadata
@@ -34,17 +41,32 @@ class NFTHandler:
         Raises:
             ValueError: If URI exceeds XRPL size limit
         """
-        # Create compact JSON
-        compact_json = json.dumps(data, separators=(',', ':'))
+        if self.uri_format == "compact":
+            uri = encode_compact(data, compress=self.compress)
+        else:
+            uri = encode_legacy(data)
         
-        # Convert to hex
-        uri_hex = str_to_hex(compact_json)
+        # XRPL URI field limit is 256 bytes (512 hex characters)
+        if len(uri) > MAX_URI_BYTES:
+            raise ValueError(f"URI too large: {len(uri)} bytes (max {MAX_URI_BYTES})")
         
-        # XRPL URI field limit is 512 bytes (256 hex characters)
-        if len(uri_hex) > 512:
-            raise ValueError(f"URI too large: {len(uri_hex)} bytes (max 512)")
+        return uri.hex()
+    
+    @staticmethod
+    def decode_nft_uri(uri_hex: str) -> dict:
+        """
+        Decode an NFT URI written in either the compact or the legacy form.
         
-        return uri_hex
+        Args:
+            uri_hex: Hex-encoded URI (as in NFToken URI fields)
+            
+        Returns:
+            Dictionary with cid and metadata
+            
+        Raises:
+            ValueError: If the URI is not a certificate URI
+        """
+        return decode_uri(bytes.fromhex(uri_hex))
     
     def mint_document_nft(self, cid: str, metadata: dict) -> Dict[str, Any]:
         """
@@ -66,25 +88,25 @@ class NFTHandler:
                 "metadata": metadata
             }
             
-            uri_hex = self.encode_nft_uri(uri_data)
+            with span("nft.encode_uri"):
+                uri_hex = self.encode_nft_uri(uri_data)
             
             print(f"🎨 Minting NFT certificate...")
             print(f"   CID: {cid}")
             print(f"   Metadata: {metadata}")
             
-            # Create NFTokenMint transaction
-            mint_tx = NFTokenMint(
-                account=self.client.wallet.address,
-                uri=uri_hex,
-                flags=8,  # tfTransferable (can be transferred)
-                transfer_fee=0,  # No transfer fee
-                nftoken_taxon=0  # Taxon for categorization
-            )
-            
-            # Submit and wait - handles autofill and signing automatically
-            response = submit_and_wait(mint_tx, self.client.client, self.client.wallet)
+            # Create NFTokenMint transaction from the least-loaded pool wallet
+            with span("nft.mint", uri_bytes=len(uri_hex) // 2):
+                result, issuer = self.client.submit_from_pool(
+                    lambda address: NFTokenMint(
+                        account=address,
+                        uri=uri_hex,
+                        flags=8,  # tfTransferable (can be transferred)
+                        transfer_fee=0,  # No transfer fee
+                        nftoken_taxon=0  # Taxon for categorization
+                    )
+                )
             
-            result = response.result
             tx_hash = result.get("hash")
             
             # Extract NFT ID from metadata
@@ -108,6 +130,7 @@ class NFTHandler:
             
             print(f"✅ NFT minted successfully!")
             print(f"   TX Hash: {tx_hash}")
+            print(f"   Issuer: {issuer}")
             if nft_id:
                 print(f"   NFT ID: {nft_id}")
             else:
@@ -117,7 +140,10 @@ class NFTHandler:
                 "nftId": nft_id,
                 "txHash": tx_hash,
                 "explorerUrl": f"{self.client.explorer_base}/transactions/{tx_hash}",
-                "uri": uri_data
+                "uri": uri_data,
+                "uriFormat": self.uri_format,
+                "uriBytes": len(uri_hex) // 2,
+                "issuer": issuer
             }
             
         except Exception as e:
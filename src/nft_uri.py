@@ -0,0 +1,172 @@
+"""
+Encoding of certificate data in NFT URIs.
+
+The XRPL caps NFTokenMint URIs at 256 bytes. The legacy form is plain JSON
+(`{"cid":...,"metadata":{...}}`), which wastes most of that budget on keys
+and on a hex digest written as text. The compact form is:
+
+    byte 0      magic 0xC1 (legacy URIs start with "{")
+    byte 1      version (high nibble) | flags (low nibble)
+    [32 bytes]  metadata sha256 in binary, if FLAG_DIGEST
+    rest        JSON with short keys, raw-deflated with a preset dictionary
+                if FLAG_DEFLATE
+
+Decoders accept both forms.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+from src.hash_utils import is_valid_sha256
+
+# XRPL limit on NFTokenMint URI
+MAX_URI_BYTES = 256
+
+MAGIC = 0xC1
+VERSION = 1
+FLAG_DEFLATE = 0x1
+FLAG_DIGEST = 0x2
+
+# Metadata fields that get one-letter keys; anything else goes under "x"
+SHORT_KEYS = {
+    "title": "t",
+    "caseId": "k",
+    "serviceId": "s",
+    "issuedAt": "i",
+    "recipient": "r",
+    "description": "d",
+}
+LONG_KEYS = {short: key for key, short in SHORT_KEYS.items()}
+
+# Preset deflate dictionary for version 1, built from typical certificate
+# payloads (most common fragments last). Never change it: decoding depends on
+# the exact bytes. A new dictionary needs a new version.
+ZDICT_V1 = (
+    b'"d":"Certificate of ","r":"","i":"2025-","x":{"documentType":"'
+    b'"https://","ipfs://","bafybei","https://ipfs.io/ipfs/'
+    b'license-renewal","business-registration","birth-certificate","tax-filing",'
+    b'"t":"Residence Permit","t":"Birth Certificate","t":"Passport Certificate",'
+    b'"k":"CR-2025-","k":"CR-2024-","s":"passport-renewal",'
+    b'{"c":"Qm'
+)
+
+
+def _compact_payload(data: Dict[str, Any]) -> Tuple[bytes, bytes]:
+    """Split URI data into (binary digest or b"", short-key JSON)."""
+    metadata = dict(data.get("metadata") or {})
+    digest = b""
+    
+    sha256_hash = metadata.get("sha256")
+    if isinstance(sha256_hash, str) and is_valid_sha256(sha256_hash):
+        digest = bytes.fromhex(metadata.pop("sha256"))
+    
+    payload: Dict[str, Any] = {"c": data.get("cid")}
+    extra = {}
+    for key, value in metadata.items():
+        if key in SHORT_KEYS:
+            payload[SHORT_KEYS[key]] = value
+        else:
+            extra[key] = value
+    if extra:
+        payload["x"] = extra
+    
+    # Any top-level fields besides cid/metadata are kept under "_"
+    rest = {key: value for key, value in data.items() if key not in ("cid", "metadata")}
+    if rest:
+        payload["_"] = rest
+    
+    return digest, json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode("utf-8")
+
+
+def encode_compact(data: Dict[str, Any], compress: bool = True) -> bytes:
+    """
+    Encode URI data in the compact form.
+    
+    Args:
+        data: Dictionary with "cid" and "metadata"
+        compress: Deflate the JSON part when that makes it smaller
+    
+    Returns:
+        Compact URI bytes
+    """
+    digest, body = _compact_payload(data)
+    flags = FLAG_DIGEST if digest else 0
+    
+    if compress:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, ZDICT_V1)
+        deflated = compressor.compress(body) + compressor.flush()
+        if len(deflated) < len(body):
+            body = deflated
+            flags |= FLAG_DEFLATE
+    
+    return bytes([MAGIC, (VERSION << 4) | flags]) + digest + body
+
+
+def encode_legacy(data: Dict[str, Any]) -> bytes:
+    """
+    Encode URI data in the legacy JSON form.
+    
+    Args:
+        data: Dictionary with "cid" and "metadata"
+    
+    Returns:
+        Legacy URI bytes
+    """
+    return json.dumps(data, separators=(',', ':')).encode("utf-8")
+
+
+def decode_uri(uri: bytes) -> Dict[str, Any]:
+    """
+    Decode URI bytes in either the compact or the legacy form.
+    
+    Args:
+        uri: Raw URI bytes
+    
+    Returns:
+        Dictionary with "cid" and "metadata"
+    
+    Raises:
+        ValueError: If the URI is in neither form
+    """
+    if not uri or uri[0] != MAGIC:
+        try:
+            return json.loads(uri.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ValueError(f"Not a certificate URI: {str(e)}")
+    
+    if len(uri) < 2 or uri[1] >> 4 != VERSION:
+        raise ValueError(f"Unsupported compact URI version: {uri[1] >> 4 if len(uri) > 1 else None}")
+    
+    flags = uri[1] & 0x0F
+    offset = 2
+    metadata: Dict[str, Any] = {}
+    
+    if flags & FLAG_DIGEST:
+        if len(uri) < offset + 32:
+            raise ValueError("Truncated compact URI: digest is incomplete")
+        metadata["sha256"] = uri[offset:offset + 32].hex()
+        offset += 32
+    
+    body = uri[offset:]
+    try:
+        if flags & FLAG_DEFLATE:
+            decompressor = zlib.decompressobj(-15, ZDICT_V1)
+            body = decompressor.decompress(body) + decompressor.flush()
+        payload = json.loads(body.decode("utf-8"))
+    except (zlib.error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Corrupt compact URI: {str(e)}")
+    if not isinstance(payload, dict):
+        raise ValueError("Corrupt compact URI: payload is not an object")
+    for key in ("x", "_"):
+        if not isinstance(payload.get(key, {}), dict):
+            raise ValueError(f"Corrupt compact URI: \"{key}\" is not an object")
+    
+    for short, value in payload.items():
+        if short in LONG_KEYS:
+            metadata[LONG_KEYS[short]] = value
+    metadata.update(payload.get("x", {}))
+    
+    data = {"cid": payload.get("c"), "metadata": metadata}
+    data.update(payload.get("_", {}))
+    return data
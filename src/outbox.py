@@ -0,0 +1,379 @@
+"""
+Durable write-ahead outbox for ledger submissions.
+
+Every write is appended to a local log before it is signed, and the signed
+hash, LastLedgerSequence and blob are appended before submission. After a
+crash, pending entries are reconciled against the ledger instead of being
+lost: validated ones are completed, live ones are resubmitted with the same
+blob, and only expired ones are signed again, so a write is never applied
+twice.
+"""
+
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one server per outbox is up to the operator
+    fcntl = None
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class OutboxEntry:
+    """One pending write and, once signed, its submission."""
+    
+    def __init__(self, entry_id: str, template: Dict[str, Any], exclude: Optional[str] = None,
+                 created: Optional[float] = None):
+        """
+        Initialize outbox entry.
+        
+        Args:
+            entry_id: Unique entry identifier
+            template: Transaction JSON without Account (filled in at signing)
+            exclude: Address that must not be used as sender
+            created: Unix time the write was accepted
+        """
+        self.id = entry_id
+        self.template = template
+        self.exclude = exclude
+        self.created = created if created is not None else time.time()
+        self.attempts = 0
+        self.account: Optional[str] = None
+        self.tx_hash: Optional[str] = None
+        self.last_ledger_sequence: Optional[int] = None
+        # Validated ledger before the blob was first submitted
+        self.min_ledger: Optional[int] = None
+        self.tx_blob: Optional[str] = None
+        # False only between signing and the first submission in this process
+        self.maybe_submitted = False
+    
+    @property
+    def signed(self) -> bool:
+        return self.tx_blob is not None
+    
+    def _enqueue_record(self) -> Dict[str, Any]:
+        return {"op": "enqueue", "id": self.id, "template": self.template,
+                "exclude": self.exclude, "created": self.created}
+    
+    def _signed_record(self) -> Dict[str, Any]:
+        return {"op": "signed", "id": self.id, "attempt": self.attempts, "account": self.account,
+                "hash": self.tx_hash, "lls": self.last_ledger_sequence, "minl": self.min_ledger,
+                "blob": self.tx_blob}
+
+
+class Outbox:
+    """Append-only JSONL log of pending ledger writes."""
+    
+    def __init__(self, path: str, compact_every: int = 1000):
+        """
+        Open the outbox, replaying any entries left pending by a previous run.
+        
+        Args:
+            path: Log file
+            compact_every: Rewrite the log without finished entries after this many
+        """
+        self.path = path
+        self.compact_every = compact_every
+        self._entries: Dict[str, OutboxEntry] = {}
+        self._finished_since_compaction = 0
+        
+        # _lock orders appends; _sync_lock lets one fsync cover every append before it
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._file = None
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Two processes draining one outbox could deliver an entry twice
+        self._lock_file = open(f"{path}.lock", "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(f"Outbox {path} is in use by another process")
+        
+        if os.path.exists(path):
+            self._replay()
+        self._compact()
+    
+    def _replay(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-append
+                    continue
+                
+                op = record.get("op")
+                if op == "enqueue":
+                    self._entries[record["id"]] = OutboxEntry(
+                        record["id"], record["template"], record.get("exclude"), record.get("created")
+                    )
+                    continue
+                
+                entry = self._entries.get(record.get("id"))
+                if entry is None:
+                    continue
+                if op == "signed":
+                    entry.attempts = record.get("attempt", entry.attempts + 1)
+                    entry.account = record["account"]
+                    entry.tx_hash = record["hash"]
+                    entry.last_ledger_sequence = record.get("lls")
+                    entry.min_ledger = record.get("minl")
+                    entry.tx_blob = record["blob"]
+                    entry.maybe_submitted = True
+                elif op == "expired":
+                    entry.tx_blob = None
+                elif op in ("done", "failed"):
+                    del self._entries[entry.id]
+    
+    def _compact(self):
+        # Callers hold both locks (or are the constructor). In-memory state is
+        # updated before each append, so the rewrite never drops a record.
+        records = []
+        for entry in self._entries.values():
+            records.append(entry._enqueue_record())
+            if entry.signed:
+                records.append(entry._signed_record())
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "a")
+        self._synced = self._written
+        self._finished_since_compaction = 0
+    
+    def _append(self, *records: Dict[str, Any], durable: bool = True):
+        lines = "".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records)
+        
+        with self._lock:
+            self._file.write(lines)
+            self._written += 1
+            ticket = self._written
+        if durable:
+            self._sync(ticket)
+    
+    def _sync(self, ticket: int):
+        # Group commit: concurrent writers share one fsync
+        with self._sync_lock:
+            if self._synced < ticket:
+                with self._lock:
+                    self._file.flush()
+                    target = self._written
+                os.fsync(self._file.fileno())
+                self._synced = target
+    
+    def enqueue(self, template: Dict[str, Any], exclude: Optional[str] = None) -> OutboxEntry:
+        """
+        Durably record a write before it is signed.
+        
+        Args:
+            template: Transaction JSON without Account
+            exclude: Address that must not be used as sender
+        
+        Returns:
+            New pending entry
+        """
+        entry = OutboxEntry(secrets.token_hex(8), template, exclude)
+        with self._lock:
+            self._entries[entry.id] = entry
+        self._append(entry._enqueue_record())
+        return entry
+    
+    def enqueue_signed(self, writes: List[Dict[str, Any]]) -> List[OutboxEntry]:
+        """
+        Durably record writes signed outside the outbox (a batch), with one fsync.
+        
+        Args:
+            writes: Dicts with "template" (transaction JSON without Account),
+                "account", "hash", "last_ledger_sequence", "min_ledger" and
+                "tx_blob"
+        
+        Returns:
+            New pending entries, in the order of `writes`
+        """
+        entries = []
+        records = []
+        for write in writes:
+            entry = OutboxEntry(secrets.token_hex(8), write["template"])
+            entry.attempts = 1
+            entry.account = write["account"]
+            entry.tx_hash = write["hash"]
+            entry.last_ledger_sequence = write["last_ledger_sequence"]
+            entry.min_ledger = write["min_ledger"]
+            entry.tx_blob = write["tx_blob"]
+            entries.append(entry)
+            records.extend((entry._enqueue_record(), entry._signed_record()))
+        
+        with self._lock:
+            for entry in entries:
+                self._entries[entry.id] = entry
+        self._append(*records)
+        return entries
+    
+    def mark_signed(self, entry: OutboxEntry, account: str, tx_hash: str,
+                    last_ledger_sequence: Optional[int], tx_blob: str,
+                    min_ledger: Optional[int] = None):
+        """
+        Durably record a signed transaction before it is submitted.
+        
+        Args:
+            entry: Pending entry
+            account: Sender address
+            tx_hash: Hash of the signed transaction
+            last_ledger_sequence: Ledger after which the transaction expires
+            tx_blob: Signed transaction blob, resubmitted as-is after a crash
+            min_ledger: Validated ledger before the blob was first submitted,
+                so its expiry can be proven after a restart
+        """
+        entry.attempts += 1
+        entry.account = account
+        entry.tx_hash = tx_hash
+        entry.last_ledger_sequence = last_ledger_sequence
+        entry.min_ledger = min_ledger
+        entry.tx_blob = tx_blob
+        entry.maybe_submitted = False
+        self._append(entry._signed_record())
+    
+    def mark_expired(self, entry: OutboxEntry):
+        """
+        Record that the signed transaction expired unvalidated and may be signed again.
+        
+        Args:
+            entry: Pending entry
+        """
+        entry.tx_blob = None
+        self._append({"op": "expired", "id": entry.id, "hash": entry.tx_hash})
+    
+    def complete(self, entry: OutboxEntry, tx_hash: str, durable: bool = True):
+        """
+        Record that the entry's transaction validated.
+        
+        Args:
+            entry: Pending entry
+            tx_hash: Hash of the validated transaction
+            durable: Sync before returning (otherwise on the next `flush`)
+        """
+        self._finish(entry, {"op": "done", "id": entry.id, "hash": tx_hash}, durable)
+    
+    def fail(self, entry: OutboxEntry, error: str, durable: bool = True):
+        """
+        Record that the entry will not be delivered.
+        
+        Args:
+            entry: Pending entry
+            error: Reason for the failure
+            durable: Sync before returning (otherwise on the next `flush`)
+        """
+        self._finish(entry, {"op": "failed", "id": entry.id, "hash": entry.tx_hash, "error": error}, durable)
+    
+    def _finish(self, entry: OutboxEntry, record: Dict[str, Any], durable: bool):
+        with self._lock:
+            self._entries.pop(entry.id, None)
+        self._append(record, durable=durable)
+        
+        with self._sync_lock, self._lock:
+            self._finished_since_compaction += 1
+            if self._finished_since_compaction >= self.compact_every:
+                self._compact()
+    
+    def adopt(self, other: "Outbox") -> int:
+        """
+        Take over the pending entries of an outbox no server is using, then close it.
+        
+        Args:
+            other: Outbox whose owner has exited
+        
+        Returns:
+            Number of entries adopted
+        """
+        entries = other.pending()
+        # Durable here before the other log is emptied, so a crash cannot lose an entry
+        for entry in entries:
+            with self._lock:
+                self._entries[entry.id] = entry
+            self._append(entry._enqueue_record())
+            if entry.signed:
+                self._append(entry._signed_record())
+        
+        with other._sync_lock, other._lock:
+            other._entries.clear()
+            other._compact()
+        other.close()
+        return len(entries)
+    
+    def flush(self):
+        """Sync every record appended so far (e.g. after many non-durable finishes)."""
+        with self._lock:
+            ticket = self._written
+        self._sync(ticket)
+    
+    def pending(self) -> List[OutboxEntry]:
+        """Entries not yet validated or failed, oldest first."""
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda entry: entry.created)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def close(self):
+        """Close the log."""
+        with self._sync_lock, self._lock:
+            self._file.close()
+            self._lock_file.close()
+
+
+def open_outbox(path: str, max_slots: int = 16) -> Optional[Outbox]:
+    """
+    Open the first outbox slot no other server holds.
+    
+    Each server process needs its own log, so slots are `path`, then
+    `outbox.1.jsonl`, `outbox.2.jsonl`, ... next to it. Pending entries of
+    existing slots that no live server holds (their owner exited or
+    crashed) are adopted, so they are still delivered.
+    
+    Args:
+        path: Path of the first slot
+        max_slots: Number of slots to try
+    
+    Returns:
+        Outbox, or None if every slot is held by another server
+    """
+    root, ext = os.path.splitext(path)
+    outbox: Optional[Outbox] = None
+    
+    for slot in range(max_slots):
+        slot_path = path if slot == 0 else f"{root}.{slot}{ext}"
+        if outbox is not None and not os.path.exists(slot_path):
+            continue
+        try:
+            candidate = Outbox(slot_path)
+        except RuntimeError:
+            # Held by a live server
+            continue
+        
+        if outbox is None:
+            outbox = candidate
+        else:
+            adopted = outbox.adopt(candidate)
+            if adopted:
+                print(f"📮 Adopted {adopted} pending write(s) from {slot_path}")
+    
+    return outbox
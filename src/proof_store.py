@@ -0,0 +1,280 @@
+"""
+Persistent store of anchored document proofs.
+
+Maps each SHA-256 digest to the transaction that anchored it, so the
+verifier can answer from local storage instead of scanning account history.
+Proofs are also indexed by serviceId, caseId and close time for searches.
+Backed by SQLite; writes are idempotent and keep the earliest anchor.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def iso_to_unix(timestamp: Optional[str]) -> Optional[int]:
+    """
+    Convert an ISO-8601 timestamp to Unix seconds.
+    
+    Args:
+        timestamp: ISO timestamp such as "2025-10-25T10:30:00Z"
+    
+    Returns:
+        Unix seconds, or None if the timestamp is missing or invalid
+    """
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _as_text(value: Any) -> Optional[str]:
+    """Metadata value as an indexable string (None if absent)."""
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+# Newest first; ties broken by digest so the order is total for cursors
+_SEARCH_ORDER = "ORDER BY close_time DESC, sha256 DESC"
+
+
+class ProofStore:
+    """SQLite-backed map of document digests to anchoring transactions."""
+    
+    def __init__(self, path: str, explorer_base: str = "https://testnet.xrpl.org"):
+        """
+        Initialize proof store.
+        
+        Args:
+            path: SQLite file (":memory:" for a throwaway store)
+            explorer_base: Explorer URL prefix used to rebuild match details
+        """
+        self.path = path
+        self.explorer_base = explorer_base
+        
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS proofs ("
+            "  sha256 TEXT PRIMARY KEY,"
+            "  tx_hash TEXT NOT NULL,"
+            "  ledger_index INTEGER,"
+            "  timestamp TEXT,"
+            "  close_time INTEGER,"
+            "  account TEXT,"
+            "  metadata TEXT,"
+            "  service_id TEXT,"
+            "  case_id TEXT"
+            ")"
+        )
+        self._migrate()
+        self._db.execute("CREATE INDEX IF NOT EXISTS proofs_by_service ON proofs (service_id, close_time, sha256)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS proofs_by_case ON proofs (case_id, close_time, sha256)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS proofs_by_time ON proofs (close_time, sha256)")
+        self._db.commit()
+    
+    def _migrate(self):
+        # Stores created before search support lack the metadata columns
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(proofs)")}
+        if "service_id" not in columns:
+            self._db.execute("ALTER TABLE proofs ADD COLUMN service_id TEXT")
+            self._db.execute("ALTER TABLE proofs ADD COLUMN case_id TEXT")
+            self._db.execute(
+                "UPDATE proofs SET"
+                "  service_id = json_extract(metadata, '$.serviceId'),"
+                "  case_id = json_extract(metadata, '$.caseId'),"
+                "  close_time = COALESCE(close_time, 0)"
+            )
+    
+    def _row_to_match(self, row) -> Dict[str, Any]:
+        tx_hash, ledger_index, timestamp, account, metadata = row
+        return {
+            "found": True,
+            "txHash": tx_hash,
+            "explorerUrl": f"{self.explorer_base}/transactions/{tx_hash}",
+            "timestamp": timestamp,
+            "metadata": json.loads(metadata) if metadata else {},
+            "ledgerIndex": ledger_index,
+            "account": account
+        }
+    
+    def get(self, sha256_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the anchor of a document digest.
+        
+        Args:
+            sha256_hash: SHA-256 hash of the document
+        
+        Returns:
+            Match details (same shape as ProofVerifier.build_match) or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tx_hash, ledger_index, timestamp, account, metadata "
+                "FROM proofs WHERE sha256 = ?",
+                (sha256_hash.lower(),)
+            ).fetchone()
+        return self._row_to_match(row) if row else None
+    
+    def add_many(self, matches: Iterable[tuple]) -> int:
+        """
+        Insert proofs, keeping the earliest anchor for digests seen twice.
+        
+        Args:
+            matches: Iterable of (sha256, match details) pairs
+        
+        Returns:
+            Number of rows written
+        """
+        rows = []
+        for sha256_hash, match in matches:
+            metadata = match.get("metadata") or {}
+            if not isinstance(metadata, dict):
+                metadata = {}
+            rows.append((
+                sha256_hash.lower(),
+                match["txHash"],
+                match.get("ledgerIndex"),
+                match.get("timestamp"),
+                iso_to_unix(match.get("timestamp")) or 0,
+                match.get("account"),
+                json.dumps(metadata, separators=(',', ':')),
+                _as_text(metadata.get("serviceId")),
+                _as_text(metadata.get("caseId"))
+            ))
+        if not rows:
+            return 0
+        
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT INTO proofs (sha256, tx_hash, ledger_index, timestamp, close_time, account, metadata, service_id, case_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET "
+                "  tx_hash = excluded.tx_hash, ledger_index = excluded.ledger_index,"
+                "  timestamp = excluded.timestamp, close_time = excluded.close_time,"
+                "  account = excluded.account, metadata = excluded.metadata,"
+                "  service_id = excluded.service_id, case_id = excluded.case_id "
+                "WHERE excluded.ledger_index < proofs.ledger_index",
+                rows
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+    
+    def search(
+        self,
+        service_id: Optional[str] = None,
+        case_id: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Find proofs by metadata and close time, newest first.
+        
+        Every filter is served from an index, and pages continue from the
+        last row returned (keyset pagination), so a query never scans history.
+        
+        Args:
+            service_id: Only proofs whose metadata serviceId matches
+            case_id: Only proofs whose metadata caseId matches
+            since: Only proofs closed at or after this Unix time
+            until: Only proofs closed at or before this Unix time
+            limit: Maximum number of proofs to return
+            cursor: `nextCursor` of the previous page
+        
+        Returns:
+            Dictionary with the matching proofs and the cursor of the next page
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        
+        if service_id is not None:
+            clauses.append("service_id = ?")
+            params.append(service_id)
+        if case_id is not None:
+            clauses.append("case_id = ?")
+            params.append(case_id)
+        if since is not None:
+            clauses.append("close_time >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("close_time <= ?")
+            params.append(until)
+        if cursor:
+            close_time, _, sha256_hash = cursor.partition(":")
+            if not close_time.isdigit() or len(sha256_hash) != 64:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            clauses.append("(close_time, sha256) < (?, ?)")
+            params.extend([int(close_time), sha256_hash])
+        
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sha256, close_time, tx_hash, ledger_index, timestamp, account, metadata "
+                f"FROM proofs {where}{_SEARCH_ORDER} LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        
+        proofs = []
+        for row in rows[:limit]:
+            match = self._row_to_match(row[2:])
+            del match["found"]
+            proofs.append({"sha256": row[0], **match})
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last[1]}:{last[0]}"
+        
+        return {"proofs": proofs, "count": len(proofs), "nextCursor": next_cursor}
+    
+    def anchors(self, batch_size: int = 10000) -> Iterator[Tuple[str, int, int, str]]:
+        """
+        Iterate over every proof's anchor, in digest order.
+        
+        Args:
+            batch_size: Rows read per query
+        
+        Yields:
+            (sha256, ledger index, close time, tx hash) tuples
+        """
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT sha256, ledger_index, close_time, tx_hash FROM proofs "
+                    "WHERE sha256 > ? ORDER BY sha256 LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM proofs").fetchone()[0]
+    
+    def close(self):
+        """Close the store."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,276 @@
+"""
+Admission control for MCP tool calls.
+
+Sits in front of XRPLClient so bursts of tool calls do not all hit the public
+node at once (and get throttled with `slowDown`). Provides per-tool
+concurrency limits, a token-bucket rate limiter sized to the node's limits,
+and a bounded priority queue that rejects new work fast when it is full.
+Reads are admitted before writes.
+"""
+
+import asyncio
+import functools
+import itertools
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.tracing import span
+
+# Lower value is admitted first
+PRIORITY_READ = 0
+PRIORITY_WRITE = 1
+
+
+class SchedulerBusy(Exception):
+    """Raised when a tool call is rejected because the server is saturated."""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter."""
+    
+    def __init__(self, rate: float, burst: float):
+        """
+        Initialize token bucket.
+        
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens held
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def try_take(self, amount: float) -> float:
+        """
+        Take tokens if available.
+        
+        A cost larger than the burst is admitted once the bucket is full and
+        leaves it in debt, so later callers wait until the whole cost is paid.
+        
+        Args:
+            amount: Number of tokens to take
+        
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they will be
+        """
+        self._refill()
+        required = min(amount, self.burst)
+        
+        if self._tokens >= required:
+            self._tokens -= amount
+            return 0.0
+        return (required - self._tokens) / self.rate
+
+
+class RequestScheduler:
+    """Priority admission scheduler for blocking tool implementations."""
+    
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: float = 20.0,
+        max_queue: int = 100,
+        queue_timeout: Optional[float] = 30.0,
+        concurrency: Optional[Dict[str, int]] = None,
+        costs: Optional[Dict[str, float]] = None,
+        default_concurrency: int = 4
+    ):
+        """
+        Initialize request scheduler.
+        
+        Args:
+            rate: Node requests per second allowed on average
+            burst: Node requests allowed in a burst
+            max_queue: Maximum number of waiting calls before rejecting new ones
+            queue_timeout: Seconds a call may wait for admission (None waits forever)
+            concurrency: Maximum concurrent calls per tool name
+            costs: Estimated node requests consumed by one call, per tool name
+            default_concurrency: Concurrency for tools missing from `concurrency`
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.concurrency = dict(concurrency or {})
+        self.costs = dict(costs or {})
+        self.default_concurrency = default_concurrency
+        
+        # Tickets with no tool only wait for tokens (see `pacer`)
+        self._waiting: List[Tuple[int, int, Optional[str], float, asyncio.Future]] = []
+        self._active: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    def _limit(self, tool: str) -> int:
+        return self.concurrency.get(tool, self.default_concurrency)
+    
+    def _pump(self):
+        """Admit waiting calls in priority order while slots and tokens allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        starved = False
+        for ticket in sorted(self._waiting):
+            _, _, tool, cost, future = ticket
+            
+            if future.done():
+                continue
+            # A tool at its concurrency limit does not hold up other tools
+            if tool is not None and self._active.get(tool, 0) >= self._limit(tool):
+                continue
+            
+            # Calls that never touch the node are admitted past a starved waiter
+            if cost > 0:
+                if starved:
+                    continue
+                delay = self.bucket.try_take(cost)
+                if delay > 0:
+                    # Tokens are reserved for the highest-priority waiter
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                    starved = True
+                    continue
+            
+            self._waiting.remove(ticket)
+            if tool is not None:
+                self._active[tool] = self._active.get(tool, 0) + 1
+            future.set_result(None)
+    
+    def _release(self, tool: str):
+        self._active[tool] -= 1
+        self._pump()
+    
+    async def run(
+        self,
+        tool: str,
+        func: Callable,
+        *args,
+        priority: int = PRIORITY_WRITE,
+        cost: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Wait for admission, then run a blocking function in a worker thread.
+        
+        Args:
+            tool: Tool name used for concurrency limits and costs
+            func: Blocking function to run
+            priority: PRIORITY_READ or PRIORITY_WRITE
+            cost: Node requests this call consumes (defaults to the tool's cost)
+            *args, **kwargs: Arguments for `func`
+        
+        Returns:
+            Return value of `func`
+        
+        Raises:
+            SchedulerBusy: If the queue is full or admission timed out
+        """
+        if len(self._waiting) >= self.max_queue:
+            raise SchedulerBusy(
+                f"Server busy: {len(self._waiting)} requests queued, retry later"
+            )
+        
+        future = asyncio.get_running_loop().create_future()
+        if cost is None:
+            cost = self.costs.get(tool, 1.0)
+        ticket = (priority, next(self._sequence), tool, cost, future)
+        self._waiting.append(ticket)
+        self._pump()
+        
+        try:
+            with span("scheduler.wait", tool=tool, priority=priority, queued=len(self._waiting)):
+                await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as we gave up; hand the slot back
+                self._release(tool)
+            else:
+                future.cancel()
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+            if isinstance(e, asyncio.TimeoutError):
+                raise SchedulerBusy(
+                    f"Server busy: {tool} waited {self.queue_timeout}s for admission, retry later"
+                )
+            raise
+        
+        def execute():
+            with span("scheduler.execute", tool=tool):
+                return func(*args, **kwargs)
+        
+        try:
+            return await asyncio.to_thread(execute)
+        finally:
+            self._release(tool)
+    
+    async def _take_tokens(self, cost: float, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        ticket = (priority, next(self._sequence), None, cost, future)
+        self._waiting.append(ticket)
+        self._pump()
+        
+        try:
+            await future
+        finally:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+    
+    def pacer(self, priority: int = PRIORITY_WRITE) -> Callable[[float], None]:
+        """
+        Token gate for node requests made by an already admitted call.
+        
+        A long-running call (e.g. a batch) is admitted for its setup cost and
+        takes tokens for each later request as it is made, queued like any
+        other call of its priority, so reads are still admitted in between
+        instead of waiting for the whole batch to be paid for.
+        
+        Must be created on the event loop; the returned callable blocks and
+        is meant for the call's worker thread.
+        
+        Args:
+            priority: Priority the requests wait with
+        
+        Returns:
+            Callable taking the number of node requests about to be made
+        """
+        loop = asyncio.get_running_loop()
+        
+        def take(cost: float = 1.0):
+            asyncio.run_coroutine_threadsafe(self._take_tokens(cost, priority), loop).result()
+        
+        return take
+    
+    def schedule(self, tool: str, priority: int = PRIORITY_WRITE) -> Callable:
+        """
+        Decorator routing a blocking tool implementation through the scheduler.
+        
+        Args:
+            tool: Tool name used for concurrency limits and costs
+            priority: PRIORITY_READ or PRIORITY_WRITE
+        
+        Returns:
+            Decorator producing an async function with the same signature
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await self.run(tool, func, *args, priority=priority, **kwargs)
+            return wrapper
+        return decorator
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of scheduler state.
+        
+        Returns:
+            Dictionary with queued and active call counts
+        """
+        return {
+            "queued": len(self._waiting),
+            "active": {tool: count for tool, count in self._active.items() if count}
+        }
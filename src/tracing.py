@@ -0,0 +1,401 @@
+"""
+Per-call tracing spans and opt-in sampling profiler.
+
+Spans show where a slow tool call spent its time (hashing, memo decoding,
+autofill, signing, submission, waiting for the ledger). They can be written
+to a JSONL file and/or sent to a local OpenTelemetry collector over
+OTLP/HTTP JSON. Tracing is a no-op until `configure_from_env()` enables an
+exporter or the profiler.
+
+Environment:
+    MCP_TRACE_FILE: Append finished spans as JSON lines to this file
+    MCP_TRACE_ENDPOINT: OTLP/HTTP traces endpoint (e.g. http://localhost:4318/v1/traces)
+    MCP_PROFILE_SLOWEST: Keep sampled profiles of the N slowest tool calls
+    MCP_PROFILE_DIR: Directory for profile dumps (default .profiles)
+    MCP_PROFILE_INTERVAL_MS: Sampling interval (default 5)
+"""
+
+import asyncio
+import functools
+import heapq
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Span:
+    """One timed operation within a trace."""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes",
+                 "start_ns", "end_ns", "error")
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns,
+            "end": self.end_ns,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded while tracing is disabled."""
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class FileExporter:
+    """Appends finished spans to a JSONL file."""
+    
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+    
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+class OTLPHttpExporter:
+    """Sends spans to an OTLP/HTTP collector in batches from a background thread."""
+    
+    def __init__(self, endpoint: str, service_name: str = "xrpl-proof-mcp", batch_size: int = 256):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._warned = False
+        threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+    
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Never slow tool calls down because the collector is behind
+            pass
+    
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+    
+    def _encode(self, spans: List[Span]) -> bytes:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": self.service_name}, "spans": otlp_spans}]
+            }]
+        }).encode()
+    
+    def _run(self):
+        while True:
+            spans = [self._queue.get()]
+            # Collect whatever else arrives within a second
+            deadline = time.monotonic() + 1.0
+            while len(spans) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    spans.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            request = urllib.request.Request(
+                self.endpoint,
+                data=self._encode(spans),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                if not self._warned:
+                    print(f"⚠️ Trace export to {self.endpoint} failed: {str(e)}")
+                    self._warned = True
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads working on a traced call and keeps folded
+    stack profiles (flamegraph format) for the slowest N calls.
+    """
+    
+    def __init__(self, slowest: int, directory: str = ".profiles", interval: float = 0.005):
+        """
+        Initialize sampling profiler.
+        
+        Args:
+            slowest: Number of slowest calls whose profiles are kept
+            directory: Directory for `.folded` profile dumps
+            interval: Seconds between samples
+        """
+        self.slowest = slowest
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+        
+        # thread id -> [trace id, nesting depth]
+        self._threads: Dict[int, List[Any]] = {}
+        self._samples: Dict[str, Counter] = {}
+        # min-heap of (duration ms, trace id, dump path)
+        self._kept: List[Tuple[float, str, str]] = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="sampling-profiler", daemon=True).start()
+    
+    def enter_thread(self, trace_id: str):
+        """Start attributing this thread's samples to a trace."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                self._threads[thread_id] = [trace_id, 1]
+            else:
+                entry[1] += 1
+    
+    def exit_thread(self):
+        """Stop attributing this thread's samples once its outermost span ends."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._threads[thread_id]
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (trace_id, _) in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is None or thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    self._samples.setdefault(trace_id, Counter())[";".join(reversed(stack))] += 1
+    
+    def finish(self, trace_id: str, name: str, duration_ms: float):
+        """
+        Keep the trace's profile if it is among the slowest calls.
+        
+        Args:
+            trace_id: Finished trace
+            name: Root span name
+            duration_ms: Root span duration
+        """
+        with self._lock:
+            samples = self._samples.pop(trace_id, None)
+            if not samples:
+                return
+            if len(self._kept) >= self.slowest and duration_ms <= self._kept[0][0]:
+                return
+            
+            path = os.path.join(
+                self.directory,
+                f"{duration_ms:010.1f}ms-{name.replace('/', '_')}-{trace_id[:8]}.folded"
+            )
+            evicted = None
+            if len(self._kept) >= self.slowest:
+                evicted = heapq.heapreplace(self._kept, (duration_ms, trace_id, path))
+            else:
+                heapq.heappush(self._kept, (duration_ms, trace_id, path))
+        
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        if evicted is not None and os.path.exists(evicted[2]):
+            os.remove(evicted[2])
+
+
+class Tracer:
+    """Creates spans and hands finished ones to exporters and the profiler."""
+    
+    def __init__(self, exporters: Optional[List[Any]] = None, profiler: Optional[SamplingProfiler] = None):
+        self.exporters = list(exporters or [])
+        self.profiler = profiler
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters) or self.profiler is not None
+    
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Any]:
+        """
+        Time a block of work as a span of the current trace.
+        
+        Args:
+            name: Span name (e.g. "xrpl.submit")
+            **attributes: Span attributes
+        
+        Yields:
+            The span, for adding attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        
+        # Event-loop threads interleave many calls, so only worker threads are sampled
+        sampled = False
+        if self.profiler is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.profiler.enter_thread(trace_id)
+                sampled = True
+        
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            if sampled:
+                self.profiler.exit_thread()
+            for exporter in self.exporters:
+                exporter.export(span)
+            if parent is None and self.profiler is not None:
+                self.profiler.finish(trace_id, name, span.duration_ms)
+
+
+_tracer = Tracer()
+
+
+def configure_from_env() -> Tracer:
+    """
+    Enable exporters and the profiler from environment variables.
+    
+    Returns:
+        The configured global tracer
+    """
+    global _tracer
+    
+    exporters = []
+    if os.getenv("MCP_TRACE_FILE"):
+        exporters.append(FileExporter(os.getenv("MCP_TRACE_FILE")))
+    if os.getenv("MCP_TRACE_ENDPOINT"):
+        exporters.append(OTLPHttpExporter(os.getenv("MCP_TRACE_ENDPOINT")))
+    
+    profiler = None
+    slowest = int(os.getenv("MCP_PROFILE_SLOWEST", "0"))
+    if slowest > 0:
+        profiler = SamplingProfiler(
+            slowest=slowest,
+            directory=os.getenv("MCP_PROFILE_DIR", ".profiles"),
+            interval=float(os.getenv("MCP_PROFILE_INTERVAL_MS", "5")) / 1000
+        )
+    
+    _tracer = Tracer(exporters, profiler)
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """
+    Time a block of work as a span of the current trace.
+    
+    Args:
+        name: Span name (e.g. "xrpl.submit")
+        **attributes: Span attributes
+    
+    Returns:
+        Context manager yielding the span
+    """
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator wrapping a sync or async function in a span.
+    
+    Args:
+        name: Span name
+    
+    Returns:
+        Decorator preserving the function's signature
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
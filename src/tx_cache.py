@@ -0,0 +1,127 @@
+"""
+Two-tier cache for validated XRPL transaction lookups.
+
+A validated transaction never changes, so once a `tx` result has been seen
+with `validated: true` it can be served without network I/O. Entries live in
+an in-memory LRU backed by an on-disk SQLite store that survives restarts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class TransactionCache:
+    """In-memory LRU of validated transactions backed by SQLite."""
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024):
+        """
+        Initialize transaction cache.
+        
+        Args:
+            path: SQLite file for the on-disk tier (None keeps the cache in memory only)
+            max_entries: Maximum number of transactions held in memory
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                "  tx_hash TEXT PRIMARY KEY,"
+                "  result TEXT NOT NULL"
+                ")"
+            )
+            self._db.commit()
+    
+    @staticmethod
+    def _key(tx_hash: str) -> str:
+        return tx_hash.upper()
+    
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def get(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached transaction.
+        
+        Args:
+            tx_hash: Transaction hash
+        
+        Returns:
+            Cached `tx` result or None on a miss
+        """
+        key = self._key(tx_hash)
+        
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return result
+            
+            if self._db is None:
+                return None
+            
+            row = self._db.execute(
+                "SELECT result FROM transactions WHERE tx_hash = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            result = json.loads(row[0])
+            self._remember(key, result)
+            return result
+    
+    def put(self, tx_hash: str, result: Dict[str, Any]) -> bool:
+        """
+        Cache a transaction result if it is validated.
+        
+        Args:
+            tx_hash: Transaction hash
+            result: `tx` (or submit-and-wait) result dictionary
+        
+        Returns:
+            True if the result was cached, False if it was not validated
+        """
+        if not tx_hash or not result.get("validated"):
+            return False
+        
+        key = self._key(tx_hash)
+        
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO transactions (tx_hash, result) VALUES (?, ?)",
+                    (key, json.dumps(result, separators=(',', ':')))
+                )
+                self._db.commit()
+        
+        return True
+    
+    def __len__(self) -> int:
+        with self._lock:
+            if self._db is None:
+                return len(self._memory)
+            return self._db.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    
+    def close(self):
+        """Close the on-disk store."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,193 @@
+"""
+Chunked, resumable document uploads for hashing large files.
+
+Instead of sending a whole PDF as one Base64 argument, clients open a session,
+append Base64 chunks, and finish to get the SHA-256 digest. Only the
+incremental hash state is kept per session, never the document itself.
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.hash_utils import decode_b64
+
+
+class UploadSession:
+    """Incremental SHA-256 state for one upload."""
+    
+    def __init__(self, session_id: str, ttl: float):
+        """
+        Initialize upload session.
+        
+        Args:
+            session_id: Unique session identifier
+            ttl: Seconds of inactivity before the session expires
+        """
+        self.session_id = session_id
+        self.ttl = ttl
+        self.hasher = hashlib.sha256()
+        self.bytes_received = 0
+        self.chunks = 0
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()
+        # Offset and digest of the last chunk, to recognise retried appends
+        self.last_chunk_offset: Optional[int] = None
+        self.last_chunk_sha256: Optional[str] = None
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.last_active > self.ttl
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the session for tool responses.
+        
+        Returns:
+            Dictionary with session id, bytes received, chunk count and expiry
+        """
+        return {
+            "sessionId": self.session_id,
+            "bytesReceived": self.bytes_received,
+            "chunks": self.chunks,
+            "expiresIn": max(0, int(self.ttl - (time.monotonic() - self.last_active)))
+        }
+
+
+class UploadSessionStore:
+    """Bounded, expiring set of upload sessions."""
+    
+    def __init__(self, ttl: float = 900, max_sessions: int = 100, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize session store.
+        
+        Args:
+            ttl: Seconds of inactivity before a session expires
+            max_sessions: Maximum number of open sessions
+            max_bytes: Maximum document size per session
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+    
+    def _purge_expired(self):
+        for session_id in [sid for sid, session in self._sessions.items() if session.expired]:
+            del self._sessions[session_id]
+    
+    def _get(self, session_id: str) -> UploadSession:
+        self._purge_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"Unknown or expired upload session: {session_id}")
+        return session
+    
+    def begin(self) -> Dict[str, Any]:
+        """
+        Open a new upload session.
+        
+        Returns:
+            Session status dictionary
+        
+        Raises:
+            ValueError: If too many sessions are open
+        """
+        with self._lock:
+            self._purge_expired()
+            if len(self._sessions) >= self.max_sessions:
+                raise ValueError(f"Too many open upload sessions (max {self.max_sessions}), retry later")
+            
+            session = UploadSession(secrets.token_urlsafe(16), self.ttl)
+            self._sessions[session.session_id] = session
+            
+            status = session.status()
+            status["maxBytes"] = self.max_bytes
+            return status
+    
+    def append(self, session_id: str, chunk_b64: str, offset: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Add a Base64 chunk to the session's hash state.
+        
+        Passing `offset` (bytes already received before this chunk) makes the
+        upload resumable: a retried chunk that was already applied is
+        acknowledged without being hashed twice, and a gap is rejected with the
+        expected offset.
+        
+        Args:
+            session_id: Upload session identifier
+            chunk_b64: Base64-encoded chunk
+            offset: Byte offset of this chunk in the document
+        
+        Returns:
+            Session status dictionary
+        
+        Raises:
+            ValueError: If the session is unknown, the offset is wrong,
+                the chunk is not valid Base64 or the document is too large
+        """
+        try:
+            chunk = decode_b64(chunk_b64)
+        except Exception as e:
+            raise ValueError(f"Failed to decode Base64 chunk: {str(e)}")
+        
+        chunk_sha256 = hashlib.sha256(chunk).hexdigest()
+        
+        with self._lock:
+            session = self._get(session_id)
+        
+        # Hash under the session's own lock so other uploads are not blocked
+        with session.lock:
+            session.last_active = time.monotonic()
+            
+            if offset is not None and offset != session.bytes_received:
+                if offset == session.last_chunk_offset and chunk_sha256 == session.last_chunk_sha256:
+                    # Retry of the chunk we just applied
+                    return session.status()
+                raise ValueError(
+                    f"Chunk offset {offset} does not match bytes received "
+                    f"({session.bytes_received}); resume from offset {session.bytes_received}"
+                )
+            
+            if session.bytes_received + len(chunk) > self.max_bytes:
+                raise ValueError(f"Document exceeds upload limit of {self.max_bytes} bytes")
+            
+            session.last_chunk_offset = session.bytes_received
+            session.last_chunk_sha256 = chunk_sha256
+            session.hasher.update(chunk)
+            session.bytes_received += len(chunk)
+            session.chunks += 1
+            
+            return session.status()
+    
+    def finish(self, session_id: str) -> Dict[str, Any]:
+        """
+        Close a session and return the document digest.
+        
+        Args:
+            session_id: Upload session identifier
+        
+        Returns:
+            Dictionary with sha256, byte count and chunk count
+        
+        Raises:
+            ValueError: If the session is unknown or expired
+        """
+        with self._lock:
+            session = self._get(session_id)
+            del self._sessions[session_id]
+        
+        # Wait for any append still hashing into this session
+        with session.lock:
+            return {
+                "sha256": session.hasher.hexdigest(),
+                "bytes": session.bytes_received,
+                "chunks": session.chunks
+            }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired()
+            return len(self._sessions)
@@ -3,27 +3,46 @@ Verification logic for checking document proofs on XRPL.
 """
 
 import json
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 from xrpl.utils import hex_to_str
-from datetime import datetime
+from datetime import datetime, timezone
+
+from src.digest_table import DigestTable
+from src.hash_utils import is_valid_sha256
+from src.proof_store import ProofStore, iso_to_unix
+from src.tracing import span
 
 
 class ProofVerifier:
     """Verifier for blockchain-based document proofs."""
     
-    def __init__(self, xrpl_client):
+    def __init__(self, xrpl_client, store: Optional[ProofStore] = None,
+                 table: Optional[DigestTable] = None):
         """
         Initialize proof verifier.
         
         Args:
             xrpl_client: Instance of XRPLClient
+            store: Optional persistent proof store holding full match details
+            table: Optional on-disk digest table, checked before scanning
         """
         self.client = xrpl_client
+        self.store = store if store is not None else ProofStore(":memory:", xrpl_client.explorer_base)
+        # Digests of every proof seen while scanning any pool wallet
+        self.table = table if table is not None else DigestTable()
+        
+        # Stores filled before the table existed seed it once
+        if len(self.table) == 0 and len(self.store) > 0:
+            self.table.add_many(self.store.anchors())
+            self.table.merge()
     
-    def parse_memo_from_transaction(self, tx: dict) -> Optional[dict]:
+    @staticmethod
+    def parse_memo_from_transaction(tx: dict) -> Optional[dict]:
         """
         Extract and parse memo data from a transaction.
         
+        A staticmethod so it can be sent to worker processes.
+        
         Args:
             tx: Transaction dictionary
             
@@ -62,6 +81,43 @@ class ProofVerifier:
             # Silently skip transactions with invalid memos
             return None
     
+    def build_match(self, tx: dict, memo_data: dict) -> Dict[str, Any]:
+        """
+        Build proof match details from a transaction and its parsed memo.
+        
+        Args:
+            tx: Transaction dictionary
+            memo_data: Parsed memo dictionary from the transaction
+            
+        Returns:
+            Dictionary with match details
+        """
+        # Extract transaction details
+        # Try tx_json first, then tx, then root
+        tx_info = tx.get("tx_json", tx.get("tx", tx))
+        tx_hash = tx.get("hash") or tx_info.get("hash")
+        
+        # Get timestamp from close_time_iso or use current time
+        timestamp = tx.get("close_time_iso")
+        if not timestamp:
+            # Try date field (Ripple epoch)
+            date_field = tx_info.get("date") or tx.get("date")
+            if date_field and isinstance(date_field, int):
+                # Convert Ripple epoch to ISO format (Ripple epoch starts Jan 1, 2000)
+                timestamp = datetime.fromtimestamp(date_field + 946684800).isoformat() + "Z"
+            else:
+                timestamp = memo_data.get("timestamp", "")
+        
+        return {
+            "found": True,
+            "txHash": tx_hash,
+            "explorerUrl": f"{self.client.explorer_base}/transactions/{tx_hash}",
+            "timestamp": timestamp,
+            "metadata": memo_data.get("metadata", {}),
+            "ledgerIndex": tx.get("ledger_index"),
+            "account": tx_info.get("Account")
+        }
+    
     def search_hash_in_transactions(self, target_hash: str, transactions: List[dict]) -> Optional[Dict[str, Any]]:
         """
         Search for a specific hash in transaction memos.
@@ -82,53 +138,166 @@ class ProofVerifier:
                 stored_hash = memo_data["hash"].lower()
                 
                 if stored_hash == target_hash_lower:
-                    # Extract transaction details
-                    # Try tx_json first, then tx, then root
-                    tx_info = tx.get("tx_json", tx.get("tx", tx))
-                    tx_hash = tx.get("hash") or tx_info.get("hash")
-                    
-                    # Get timestamp from close_time_iso or use current time
-                    timestamp = tx.get("close_time_iso")
-                    if not timestamp:
-                        # Try date field (Ripple epoch)
-                        date_field = tx_info.get("date") or tx.get("date")
-                        if date_field and isinstance(date_field, int):
-                            # Convert Ripple epoch to ISO format (Ripple epoch starts Jan 1, 2000)
-                            timestamp = datetime.fromtimestamp(date_field + 946684800).isoformat() + "Z"
-                        else:
-                            timestamp = memo_data.get("timestamp", "")
-                    
-                    return {
-                        "found": True,
-                        "txHash": tx_hash,
-                        "explorerUrl": f"{self.client.explorer_base}/transactions/{tx_hash}",
-                        "timestamp": timestamp,
-                        "metadata": memo_data.get("metadata", {}),
-                        "ledgerIndex": tx.get("ledger_index")
-                    }
+                    return self.build_match(tx, memo_data)
         
         return None
     
+    def index_transactions(self, transactions: List[dict]) -> int:
+        """
+        Add every proof memo in a list of transactions to the local index.
+        
+        Args:
+            transactions: List of transaction dictionaries
+            
+        Returns:
+            Number of proofs indexed
+        """
+        indexed = 0
+        
+        with span("verifier.decode_memos", transactions=len(transactions)) as decode_span:
+            indexed = self._index_transactions(transactions)
+            decode_span.set_attribute("indexed", indexed)
+        
+        return indexed
+    
+    def _index_transactions(self, transactions: List[dict]) -> int:
+        return self.index_memos(
+            (tx, self.parse_memo_from_transaction(tx)) for tx in transactions
+        )
+    
+    def index_memos(self, decoded: Iterable[Tuple[dict, Optional[dict]]]) -> int:
+        """
+        Add already-decoded proof memos to the index and the proof store.
+        
+        Args:
+            decoded: Iterable of (transaction, parsed memo or None) pairs
+            
+        Returns:
+            Number of proofs newly indexed
+        """
+        indexed = 0
+        updated: Dict[str, Dict[str, Any]] = {}
+        
+        for tx, memo_data in decoded:
+            if memo_data and isinstance(memo_data.get("hash"), str):
+                stored_hash = memo_data["hash"].lower()
+                # Only well-formed digests can be verified (and fit the table)
+                if not is_valid_sha256(stored_hash):
+                    continue
+                match = self.build_match(tx, memo_data)
+                
+                if stored_hash in updated:
+                    earliest = updated[stored_hash].get("ledgerIndex") or 0
+                else:
+                    anchor = self.table.get(stored_hash)
+                    earliest = anchor[0] if anchor else None
+                
+                # Keep the earliest anchor if a hash was recorded twice
+                if earliest is None:
+                    indexed += 1
+                elif earliest <= (match.get("ledgerIndex") or 0):
+                    continue
+                
+                updated[stored_hash] = match
+        
+        # Details first, so a table hit always finds them in the store
+        self.store.add_many(updated.items())
+        self.table.add_many(
+            (stored_hash, match.get("ledgerIndex"), iso_to_unix(match.get("timestamp")), match.get("txHash"))
+            for stored_hash, match in updated.items()
+        )
+        
+        return indexed
+    
+    def record_submissions(self, submissions: Iterable[Tuple[dict, Dict[str, Any]]]) -> int:
+        """
+        Index proofs this server has just anchored, without rescanning history.
+        
+        Args:
+            submissions: Iterable of (submitted memo payload, submission result
+                with txHash, ledgerIndex, closeTime and account) pairs
+            
+        Returns:
+            Number of proofs newly indexed
+        """
+        return self.index_memos(
+            (
+                {
+                    "hash": result["txHash"],
+                    "ledger_index": result.get("ledgerIndex"),
+                    # Ledger close time, not the memo's pre-submission clock
+                    "close_time_iso": result.get("closeTime"),
+                    "tx_json": {"Account": result.get("account")}
+                },
+                memo_data
+            )
+            for memo_data, result in submissions
+        )
+    
+    def lookup(self, sha256_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a hash in the digest table, with details from the proof store.
+        
+        Args:
+            sha256_hash: SHA-256 hash to look up
+            
+        Returns:
+            Match details or None if the hash has not been indexed
+        """
+        anchor = self.table.get(sha256_hash.lower())
+        if anchor is None:
+            return None
+        
+        match = self.store.get(sha256_hash)
+        if match is None:
+            # Table shared with a process that writes to a different store
+            ledger_index, close_time, tx_hash = anchor
+            timestamp = ""
+            if close_time:
+                timestamp = datetime.fromtimestamp(close_time, timezone.utc).isoformat().replace("+00:00", "Z")
+            match = {
+                "found": True,
+                "txHash": tx_hash,
+                "explorerUrl": f"{self.client.explorer_base}/transactions/{tx_hash}",
+                "timestamp": timestamp,
+                "metadata": {},
+                "ledgerIndex": ledger_index,
+                "account": None
+            }
+        return match
+    
     def verify_proof(self, sha256_hash: str, search_limit: int = 50) -> Dict[str, Any]:
         """
         Verify if a document hash exists on the blockchain.
         
+        Searches every wallet in the client's pool, so callers do not need to
+        know which account anchored the document.
+        
         Args:
             sha256_hash: SHA-256 hash to verify
-            search_limit: Number of recent transactions to search
+            search_limit: Number of recent transactions to search per wallet
             
         Returns:
             Verification result dictionary
         """
         print(f"🔍 Searching for hash: {sha256_hash}")
-        print(f"   Checking last {search_limit} transactions...")
         
         try:
-            # Query recent transactions
-            transactions = self.client.query_account_transactions(limit=search_limit)
+            with span("verifier.index_lookup") as lookup_span:
+                match = self.lookup(sha256_hash)
+                lookup_span.set_attribute("hit", match is not None)
             
-            # Search for hash
-            match = self.search_hash_in_transactions(sha256_hash, transactions)
+            if match is None:
+                addresses = self.client.wallet_pool.addresses
+                print(f"   Checking last {search_limit} transactions of {len(addresses)} wallet(s)...")
+                
+                for address in addresses:
+                    with span("verifier.scan_wallet", account=address, limit=search_limit):
+                        # Query recent transactions
+                        transactions = self.client.query_account_transactions(limit=search_limit, account=address)
+                        self.index_transactions(transactions)
+                
+                match = self.lookup(sha256_hash)
             
             if match:
                 print(f"✅ Proof found on blockchain!")
@@ -142,7 +311,8 @@ class ProofVerifier:
                     "explorerUrl": match["explorerUrl"],
                     "timestamp": match["timestamp"],
                     "metadata": match["metadata"],
-                    "ledgerIndex": match["ledgerIndex"]
+                    "ledgerIndex": match["ledgerIndex"],
+                    "account": match["account"]
                 }
             else:
                 print(f"❌ Proof not found in recent transactions")
@@ -150,7 +320,7 @@ class ProofVerifier:
                 return {
                     "sha256": sha256_hash,
                     "found": False,
-                    "message": f"Hash not found in last {search_limit} transactions"
+                    "message": f"Hash not found in last {search_limit} transactions of any pool wallet"
                 }
                 
         except Exception as e:
@@ -0,0 +1,137 @@
+"""
+Wallet pool for spreading XRPL writes across several issuing accounts.
+
+Each XRPL account has its own sequence numbers and transaction-queue limits,
+so a single issuing wallet caps write throughput. The pool hands out the
+least-loaded wallet for every submission, and reserves each wallet's Sequence
+numbers so concurrent submissions from one wallet never sign the same one.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from xrpl.wallet import Wallet
+
+
+class WalletPool:
+    """Pool of issuing wallets with least-loaded scheduling."""
+    
+    def __init__(self, seeds: List[str]):
+        """
+        Initialize wallet pool.
+        
+        Args:
+            seeds: XRPL wallet seeds; the first one is the primary wallet
+        
+        Raises:
+            ValueError: If no seed is provided
+        """
+        unique_seeds = list(dict.fromkeys(seed.strip() for seed in seeds if seed and seed.strip()))
+        if not unique_seeds:
+            raise ValueError("At least one wallet seed is required")
+        
+        self.wallets: List[Wallet] = [Wallet.from_seed(seed) for seed in unique_seeds]
+        self._in_flight: Dict[str, int] = {wallet.address: 0 for wallet in self.wallets}
+        self._submitted: Dict[str, int] = {wallet.address: 0 for wallet in self.wallets}
+        self._lock = threading.Lock()
+        
+        # Next unreserved Sequence per wallet (None until read from the ledger)
+        self._next_sequence: Dict[str, Optional[int]] = {wallet.address: None for wallet in self.wallets}
+        self._sequence_locks: Dict[str, threading.Lock] = {
+            wallet.address: threading.Lock() for wallet in self.wallets
+        }
+    
+    @property
+    def primary(self) -> Wallet:
+        """The first wallet in the pool."""
+        return self.wallets[0]
+    
+    @property
+    def addresses(self) -> List[str]:
+        """Classic addresses of every wallet in the pool."""
+        return [wallet.address for wallet in self.wallets]
+    
+    def __len__(self) -> int:
+        return len(self.wallets)
+    
+    @contextmanager
+    def acquire(self, exclude: Optional[str] = None) -> Iterator[Wallet]:
+        """
+        Reserve the least-loaded wallet for one submission.
+        
+        Wallets are ranked by in-flight submissions, then by how many
+        submissions they have handled, so load spreads evenly over time.
+        
+        Args:
+            exclude: Address that must not be used (e.g. a payment destination)
+        
+        Yields:
+            Wallet to sign and submit with
+        
+        Raises:
+            ValueError: If every wallet in the pool is excluded
+        """
+        with self._lock:
+            candidates = [wallet for wallet in self.wallets if wallet.address != exclude]
+            if not candidates:
+                raise ValueError("Destination cannot be the same as sender address")
+            
+            wallet = min(
+                candidates,
+                key=lambda w: (self._in_flight[w.address], self._submitted[w.address])
+            )
+            self._in_flight[wallet.address] += 1
+            self._submitted[wallet.address] += 1
+        
+        try:
+            yield wallet
+        finally:
+            with self._lock:
+                self._in_flight[wallet.address] -= 1
+    
+    def reserve_sequences(self, address: str, count: int, fetch: Callable[[str], int]) -> int:
+        """
+        Reserve consecutive Sequence numbers for a pool wallet.
+        
+        Args:
+            address: Wallet address
+            count: Number of Sequence numbers to reserve
+            fetch: Callable reading the account's next Sequence from the ledger,
+                used the first time and after a resync
+        
+        Returns:
+            First reserved Sequence number
+        """
+        with self._sequence_locks[address]:
+            sequence = self._next_sequence[address]
+            if sequence is None:
+                sequence = fetch(address)
+            self._next_sequence[address] = sequence + count
+            return sequence
+    
+    def resync_sequence(self, address: str):
+        """
+        Forget a wallet's next Sequence so the next reservation reads it again.
+        
+        Called when a reserved Sequence was not consumed (the transaction was
+        never submitted, rejected or expired) or the node reported it out of
+        order (tefPAST_SEQ, terPRE_SEQ).
+        
+        Args:
+            address: Wallet address (ignored if it is not in the pool)
+        """
+        lock = self._sequence_locks.get(address)
+        if lock is None:
+            return
+        with lock:
+            self._next_sequence[address] = None
+    
+    def load(self) -> Dict[str, int]:
+        """
+        Snapshot of in-flight submissions per wallet address.
+        
+        Returns:
+            Mapping of address to number of submissions in progress
+        """
+        with self._lock:
+            return dict(self._in_flight)
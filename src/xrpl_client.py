@@ -3,47 +3,408 @@ XRPL Client for interacting with the XRP Ledger testnet.
 Handles connections, transactions, and queries.
 """
 
+import contextvars
 import json
-from typing import Optional, Dict, List, Any
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Optional, Dict, List, Any, Callable, Tuple
 from datetime import datetime
 from xrpl.clients import JsonRpcClient, WebsocketClient
-from xrpl.wallet import Wallet
-from xrpl.models.transactions import Payment, Memo, AccountSet
-from xrpl.models.requests import AccountTx, Tx
-from xrpl.transaction import submit_and_wait
-from xrpl.utils import hex_to_str, str_to_hex
+from xrpl.models.transactions import Payment, Memo, AccountSet, Transaction
+from xrpl.models.requests import AccountTx, Tx, SubmitOnly
+from xrpl.transaction import autofill, sign, XRPLReliableSubmissionException
+from xrpl.account import get_next_valid_seq_number
+from xrpl.core.binarycodec import encode
+from xrpl.ledger import get_fee, get_latest_validated_ledger_sequence
+from xrpl.utils import hex_to_str, ripple_time_to_datetime, str_to_hex
+
+from src.wallet_pool import WalletPool
+from src.tx_cache import TransactionCache
+from src.confirmation_tracker import ConfirmationTracker, TransactionExpired
+from src.batch_signer import BatchSigner
+from src.outbox import Outbox, OutboxEntry
+from src.tracing import span
+
+# Placeholder senders for outbox templates (ACCOUNT_ZERO, ACCOUNT_ONE); the
+# real sender is filled in when the entry is signed
+_TEMPLATE_ACCOUNTS = ("rrrrrrrrrrrrrrrrrrrrrhoLvTp", "rrrrrrrrrrrrrrrrrrrrBZbvji")
 
 
 class XRPLClient:
     """Client for XRPL testnet operations."""
     
-    def __init__(self, seed: str, network_url: str):
+    def __init__(
+        self,
+        seed: str,
+        network_url: str,
+        extra_seeds: Optional[List[str]] = None,
+        tx_cache: Optional[TransactionCache] = None,
+        outbox: Optional[Outbox] = None
+    ):
         """
         Initialize XRPL client.
         
         Args:
-            seed: XRPL wallet seed/secret
+            seed: XRPL wallet seed/secret of the primary wallet
             network_url: WebSocket URL for XRPL network
+            extra_seeds: Additional issuing wallet seeds to shard writes across
+            tx_cache: Cache for validated transaction lookups (in-memory LRU by default)
+            outbox: Durable log that single writes go through (none by default)
         """
         self.network_url = network_url
-        self.wallet = Wallet.from_seed(seed)
+        self.wallet_pool = WalletPool([seed] + list(extra_seeds or []))
+        self.wallet = self.wallet_pool.primary
         self.client: Optional[WebsocketClient] = None
         self.explorer_base = "https://testnet.xrpl.org"
+        self.tx_cache = tx_cache if tx_cache is not None else TransactionCache()
+        # One ledger subscription confirms every in-flight transaction
+        self.confirmations = ConfirmationTracker(network_url, self.wallet_pool.addresses)
+        self.confirm_timeout = 120.0
+        # Process pool for signing bulk submissions
+        self.batch_signer = BatchSigner()
+        # Writes are persisted here before signing and delivered by worker threads
+        self.outbox = outbox
+        self.outbox_workers = 16
+        self.outbox_max_attempts = 3
+        self.outbox_retry_delay = 2.0
+        self._outbox_executor: Optional[ThreadPoolExecutor] = None
+        self._connect_lock = threading.Lock()
         
     def connect(self):
         """Establish connection to XRPL network."""
-        if self.client is None or not self.client.is_open():
-            self.client = WebsocketClient(self.network_url)
-            self.client.open()
-            print(f"✅ Connected to XRPL testnet")
-            print(f"📍 Wallet address: {self.wallet.address}")
+        with self._connect_lock:
+            if self.client is None or not self.client.is_open():
+                self.client = WebsocketClient(self.network_url)
+                self.client.open()
+                print(f"✅ Connected to XRPL testnet")
+                print(f"📍 Wallet address: {self.wallet.address}")
+                if len(self.wallet_pool) > 1:
+                    print(f"👛 Wallet pool: {len(self.wallet_pool)} issuing accounts")
     
     def disconnect(self):
         """Close connection to XRPL network."""
+        self.confirmations.stop()
+        self.batch_signer.close()
+        if self._outbox_executor is not None:
+            self._outbox_executor.shutdown(wait=False)
+            self._outbox_executor = None
         if self.client and self.client.is_open():
             self.client.close()
             print("🔌 Disconnected from XRPL testnet")
     
+    def submit_from_pool(
+        self,
+        build_transaction: Callable[[str], Transaction],
+        exclude: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Sign and submit a transaction from the least-loaded pool wallet.
+        
+        Args:
+            build_transaction: Callable building the transaction for a given sender address
+            exclude: Address that must not be used as sender
+            
+        Returns:
+            Tuple of (validated transaction result, sender address)
+        """
+        self.connect()
+        
+        if self.outbox is not None:
+            with span("xrpl.submit_from_pool", pool_size=len(self.wallet_pool), outbox=True):
+                result, address = self._submit_via_outbox(build_transaction, exclude)
+        else:
+            with self.wallet_pool.acquire(exclude=exclude) as wallet:
+                transaction = build_transaction(wallet.address)
+                with span("xrpl.submit_from_pool", account=wallet.address, pool_size=len(self.wallet_pool)):
+                    result = self.submit_and_confirm(transaction, wallet)
+            address = wallet.address
+        
+        # Warm the lookup cache with what we just validated
+        self.tx_cache.put(result.get("hash"), result)
+        
+        return result, address
+    
+    def submit_and_confirm(self, transaction: Transaction, wallet) -> Dict[str, Any]:
+        """
+        Autofill, sign and submit a transaction, then wait for validation.
+        
+        Unlike `submit_and_wait`, this does not poll the node per transaction:
+        the shared confirmation tracker resolves it from the ledger stream.
+        
+        Args:
+            transaction: Unsigned transaction
+            wallet: Wallet to sign with
+            
+        Returns:
+            Validated transaction result
+            
+        Raises:
+            XRPLReliableSubmissionException: If the transaction fails or expires
+        """
+        self.connect()
+        self.confirmations.start()
+        
+        # The transaction cannot be in this ledger or any before it
+        min_ledger = self.confirmations.validated_ledger
+        signed = self._autofill_and_sign(transaction, wallet)
+        tx_hash = signed.get_hash()
+        
+        # Register before submitting so the validation cannot be missed
+        future = self.confirmations.track(tx_hash, signed.last_ledger_sequence, min_ledger)
+        
+        try:
+            engine_result = self._submit_blob(tx_hash, encode(signed.to_xrpl()))
+        except Exception:
+            self.confirmations.forget(tx_hash)
+            # Not applied, so its Sequence is free again (or the reserved one was stale)
+            self.wallet_pool.resync_sequence(wallet.address)
+            raise
+        self._check_sequence(wallet.address, engine_result)
+        
+        try:
+            return self._wait_validation(tx_hash, future, self.confirm_timeout)
+        except TransactionExpired:
+            self.wallet_pool.resync_sequence(wallet.address)
+            raise
+    
+    def _fetch_sequence(self, address: str) -> int:
+        return get_next_valid_seq_number(address, self.client)
+    
+    def _autofill_and_sign(self, transaction: Transaction, wallet) -> Transaction:
+        # autofill reads the account's current Sequence, which concurrent
+        # submissions from the same wallet would all get; reserve it instead
+        sequence = self.wallet_pool.reserve_sequences(wallet.address, 1, self._fetch_sequence)
+        try:
+            transaction = type(transaction).from_dict({**transaction.to_dict(), "sequence": sequence})
+            with span("xrpl.autofill", transaction_type=transaction.transaction_type.value):
+                filled = autofill(transaction, self.client)
+            with span("xrpl.sign"):
+                return sign(filled, wallet)
+        except Exception:
+            self.wallet_pool.resync_sequence(wallet.address)
+            raise
+    
+    def _check_sequence(self, address: str, engine_result: str):
+        # ter results other than terQUEUED are not applied and leave a gap
+        # behind their Sequence (terPRE_SEQ: an earlier reserved one never arrived)
+        if engine_result.startswith("ter") and engine_result != "terQUEUED":
+            self.wallet_pool.resync_sequence(address)
+    
+    def _submit_blob(self, tx_hash: str, tx_blob: str, resubmission: bool = False) -> str:
+        """Submit a signed blob; returns the preliminary engine result."""
+        with span("xrpl.submit", tx_hash=tx_hash, resubmission=resubmission) as submit_span:
+            response = self.client.request(SubmitOnly(tx_blob=tx_blob))
+            engine_result = response.result.get("engine_result", "")
+            submit_span.set_attribute("engine_result", engine_result)
+        
+        # A resubmitted blob may be rejected only because it already applied
+        # (tefPAST_SEQ, tefALREADY); the tracker decides once its ledger passes
+        if resubmission:
+            return engine_result
+        
+        # Malformed or never-applicable transactions will not validate
+        if not response.is_successful() or engine_result.startswith(("tem", "tef")):
+            raise XRPLReliableSubmissionException(
+                f"Transaction failed: {engine_result or response.result}"
+            )
+        return engine_result
+    
+    def _wait_validation(self, tx_hash: str, future: Future, timeout: Optional[float]) -> Dict[str, Any]:
+        try:
+            with span("xrpl.wait_validation", tx_hash=tx_hash, pending=self.confirmations.pending_count()):
+                return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.confirmations.forget(tx_hash)
+            raise XRPLReliableSubmissionException(
+                f"Transaction {tx_hash} not validated within {timeout}s"
+            )
+    
+    def _outbox_pool(self) -> ThreadPoolExecutor:
+        with self._connect_lock:
+            if self._outbox_executor is None:
+                self._outbox_executor = ThreadPoolExecutor(
+                    max_workers=self.outbox_workers,
+                    thread_name_prefix="xrpl-outbox"
+                )
+            return self._outbox_executor
+    
+    def _submit_via_outbox(
+        self,
+        build_transaction: Callable[[str], Transaction],
+        exclude: Optional[str]
+    ) -> Tuple[Dict[str, Any], str]:
+        # Persist a serializable template before anything is signed
+        placeholder = _TEMPLATE_ACCOUNTS[1] if exclude == _TEMPLATE_ACCOUNTS[0] else _TEMPLATE_ACCOUNTS[0]
+        template = build_transaction(placeholder).to_xrpl()
+        del template["Account"]
+        entry = self.outbox.enqueue(template, exclude)
+        
+        future = self._outbox_pool().submit(contextvars.copy_context().run, self._deliver, entry)
+        try:
+            return future.result(timeout=self.confirm_timeout)
+        except FutureTimeoutError:
+            # Still owned by the outbox worker: the caller must not retry blindly
+            raise XRPLReliableSubmissionException(
+                f"Transaction {entry.tx_hash or entry.id} not validated within {self.confirm_timeout}s; "
+                f"it remains in the outbox and will still be delivered"
+            )
+    
+    def recover_outbox(self) -> int:
+        """
+        Resume delivery of writes left pending by a previous run.
+        
+        Entries signed before the restart (including batch items) are looked
+        up first and resubmitted with the same blob; only entries whose
+        LastLedgerSequence has passed without validation are signed again.
+        
+        Returns:
+            Number of entries being recovered
+        """
+        if self.outbox is None:
+            return 0
+        
+        pending = self.outbox.pending()
+        for entry in pending:
+            self._deliver_in_background(entry)
+        
+        if pending:
+            print(f"📮 Recovering {len(pending)} pending outbox write(s)")
+        return len(pending)
+    
+    def _deliver_in_background(self, entry: OutboxEntry):
+        def report(future: Future):
+            if future.exception() is not None:
+                print(f"⚠️ Outbox entry {entry.id} failed: {future.exception()}")
+        
+        self._outbox_pool().submit(self._deliver, entry).add_done_callback(report)
+    
+    def _deliver(self, entry: OutboxEntry) -> Tuple[Dict[str, Any], str]:
+        """Drive an outbox entry until it validates, fails or runs out of attempts."""
+        with span("xrpl.outbox.deliver", entry=entry.id, recovered=entry.maybe_submitted):
+            while True:
+                if entry.signed:
+                    result = self._attempt(entry)
+                else:
+                    if entry.attempts >= self.outbox_max_attempts:
+                        error = f"Transaction expired {entry.attempts} time(s) without validating"
+                        self.outbox.fail(entry, error)
+                        raise TransactionExpired(error)
+                    
+                    try:
+                        with self.wallet_pool.acquire(exclude=entry.exclude) as wallet:
+                            self._sign_entry(entry, wallet)
+                            result = self._attempt(entry)
+                    except Exception as e:
+                        if not entry.signed:
+                            # Nothing was submitted, so the write can be dropped safely
+                            self.outbox.fail(entry, str(e))
+                        raise
+                
+                if result is not None:
+                    self.outbox.complete(entry, result.get("hash"))
+                    return result, entry.account
+    
+    def _sign_entry(self, entry: OutboxEntry, wallet):
+        self.connect()
+        self.confirmations.start()
+        min_ledger = self.confirmations.validated_ledger
+        transaction = Transaction.from_xrpl({**entry.template, "Account": wallet.address})
+        signed = self._autofill_and_sign(transaction, wallet)
+        
+        # Durable before submission, so a crash can only ever resubmit this exact blob
+        try:
+            self.outbox.mark_signed(
+                entry,
+                account=wallet.address,
+                tx_hash=signed.get_hash(),
+                last_ledger_sequence=signed.last_ledger_sequence,
+                tx_blob=encode(signed.to_xrpl()),
+                min_ledger=min_ledger
+            )
+        except Exception:
+            self.wallet_pool.resync_sequence(wallet.address)
+            raise
+    
+    def _attempt(self, entry: OutboxEntry) -> Optional[Dict[str, Any]]:
+        """Submit an entry's signed blob and wait; None if it should be tried again."""
+        try:
+            return self._submit_entry(entry)
+        except TransactionExpired:
+            # Really expired: its ledger range passed without it, so signing again cannot duplicate it
+            self.outbox.mark_expired(entry)
+            self.wallet_pool.resync_sequence(entry.account)
+            return None
+        except XRPLReliableSubmissionException as e:
+            # Rejected on submission or validated with a failure code
+            self.outbox.fail(entry, str(e))
+            self.wallet_pool.resync_sequence(entry.account)
+            raise
+        except Exception as e:
+            # Connection trouble: the blob may or may not have reached the node
+            print(f"⚠️ Outbox entry {entry.id} delivery interrupted, retrying: {str(e)}")
+            time.sleep(self.outbox_retry_delay)
+            return None
+    
+    def _submit_entry(self, entry: OutboxEntry) -> Dict[str, Any]:
+        self.connect()
+        self.confirmations.start()
+        
+        future = self.confirmations.track(entry.tx_hash, entry.last_ledger_sequence, entry.min_ledger)
+        resubmission = entry.maybe_submitted
+        entry.maybe_submitted = True
+        
+        try:
+            # A blob from an earlier attempt or run may have validated while nobody was listening
+            if not resubmission or not self.confirmations.check(self.client, entry.tx_hash):
+                engine_result = self._submit_blob(entry.tx_hash, entry.tx_blob, resubmission=resubmission)
+                self._check_sequence(entry.account, engine_result)
+        except Exception:
+            self.confirmations.forget(entry.tx_hash)
+            raise
+        
+        # No timeout: the tracker resolves it as validated or expired once its ledger passes
+        return self._wait_validation(entry.tx_hash, future, None)
+    
+    @staticmethod
+    def close_time_iso(result: Dict[str, Any]) -> Optional[str]:
+        """
+        Close time of the ledger that validated a transaction.
+        
+        Args:
+            result: Validated transaction result
+            
+        Returns:
+            ISO-8601 UTC timestamp, or None if the result carries no close time
+        """
+        if result.get("close_time_iso"):
+            return result["close_time_iso"]
+        date = result.get("date") or (result.get("tx_json") or {}).get("date")
+        if isinstance(date, int):
+            return ripple_time_to_datetime(date).isoformat().replace("+00:00", "Z")
+        return None
+    
+    def build_proof_memo(self, memo_data: dict) -> Memo:
+        """
+        Build the `gov-proof` memo carrying a timestamp proof.
+        
+        Args:
+            memo_data: Dictionary to include in memo
+            
+        Returns:
+            Memo with hex-encoded compact JSON
+        """
+        # Convert memo data to hex-encoded JSON
+        memo_json = json.dumps(memo_data, separators=(',', ':'))
+        memo_hex = str_to_hex(memo_json)
+        
+        # Create memo object
+        return Memo(
+            memo_type=str_to_hex("gov-proof"),
+            memo_data=memo_hex
+        )
+    
     def submit_memo_transaction(self, memo_data: dict) -> Dict[str, Any]:
         """
         Submit an AccountSet transaction with memo data for timestamp proofs.
@@ -60,52 +421,284 @@ class XRPLClient:
         self.connect()
         
         try:
-            # Convert memo data to hex-encoded JSON
-            memo_json = json.dumps(memo_data, separators=(',', ':'))
-            memo_hex = str_to_hex(memo_json)
-            
-            # Create memo object
-            memo = Memo(
-                memo_type=str_to_hex("gov-proof"),
-                memo_data=memo_hex
-            )
+            memo = self.build_proof_memo(memo_data)
             
             # Create AccountSet transaction
             # This is a valid way to store memo data on XRPL without changing anything
-            account_set = AccountSet(
-                account=self.wallet.address,
-                memos=[memo]
-            )
-            
-            # Submit and wait - this handles autofill and signing automatically
             print("📤 Submitting transaction to XRPL...")
-            response = submit_and_wait(account_set, self.client, self.wallet)
+            result, account = self.submit_from_pool(
+                lambda address: AccountSet(account=address, memos=[memo])
+            )
             
-            result = response.result
             tx_hash = result.get("hash")
             ledger_index = result.get("ledger_index")
             
             print(f"✅ Transaction validated!")
             print(f"   TX Hash: {tx_hash}")
             print(f"   Ledger: {ledger_index}")
+            print(f"   Account: {account}")
             
             return {
                 "txHash": tx_hash,
                 "explorerUrl": f"{self.explorer_base}/transactions/{tx_hash}",
                 "ledgerIndex": ledger_index,
-                "validated": result.get("validated", False)
+                "closeTime": self.close_time_iso(result),
+                "validated": result.get("validated", False),
+                "account": account
             }
             
         except Exception as e:
             print(f"❌ Transaction failed: {str(e)}")
             raise Exception(f"Failed to submit memo transaction: {str(e)}")
     
-    def query_account_transactions(self, limit: int = 50) -> List[Dict]:
+    def prepare_batch(self, builders: List[Callable[[str], Transaction]]) -> List[Dict[str, Any]]:
+        """
+        Fill and sign a batch of transactions across the wallet pool.
+        
+        Transactions are spread round-robin over the pool wallets and filled
+        offline (consecutive sequence numbers, one fee and ledger lookup per
+        batch), then signed in parallel by the batch signer.
+        
+        Args:
+            builders: Callables building each transaction for a given sender address
+            
+        Returns:
+            Signed entries in input order, each with account, sequence,
+            tx_blob, hash, min_ledger, last_ledger_sequence and the unsigned
+            template
+        """
+        self.connect()
+        
+        wallets = self.wallet_pool.wallets
+        with span("xrpl.batch.fill", size=len(builders), wallets=len(wallets)):
+            sign_jobs, filled_entries = self._fill_batch(builders, wallets)
+        
+        print(f"✍️ Signing {len(builders)} transactions across {self.batch_signer.workers} worker(s)...")
+        try:
+            with span("xrpl.batch.sign", size=len(builders), workers=self.batch_signer.workers):
+                signed_batches = self.batch_signer.sign_batches(sign_jobs)
+        except Exception:
+            # None of the reserved Sequence numbers will be used
+            for wallet, _ in sign_jobs:
+                self.wallet_pool.resync_sequence(wallet.address)
+            raise
+        
+        signed_blobs = [blob for batch in signed_batches for blob in batch]
+        for entry, (tx_blob, tx_hash) in zip(filled_entries, signed_blobs):
+            entry["tx_blob"] = tx_blob
+            entry["hash"] = tx_hash
+        
+        return sorted(filled_entries, key=lambda entry: entry["index"])
+    
+    def _fill_batch(self, builders: List[Callable[[str], Transaction]], wallets: List) -> Tuple[List, List[Dict[str, Any]]]:
+        """Build and fill batch transactions offline; returns (sign jobs, entries)."""
+        fee = get_fee(self.client)
+        validated_ledger = get_latest_validated_ledger_sequence(self.client)
+        
+        # wallet index -> list of (input index, transaction)
+        assignments: Dict[int, List[Tuple[int, Transaction]]] = {}
+        for index, build in enumerate(builders):
+            wallet_index = index % len(wallets)
+            assignments.setdefault(wallet_index, []).append((index, build(wallets[wallet_index].address)))
+        
+        sign_jobs = []
+        filled_entries = []
+        for wallet_index, items in assignments.items():
+            wallet = wallets[wallet_index]
+            # Reserved like single writes, so concurrent tools on this wallet cannot collide
+            sequence = self.wallet_pool.reserve_sequences(wallet.address, len(items), self._fetch_sequence)
+            # Submissions are paced per account, so leave each one ledger per transaction
+            last_ledger_sequence = validated_ledger + 20 + len(items)
+            
+            tx_dicts = []
+            for offset, (index, transaction) in enumerate(items):
+                tx_dict = transaction.to_xrpl()
+                # What the outbox signs again should this one expire after a crash
+                template = {key: value for key, value in tx_dict.items() if key != "Account"}
+                tx_dict.update({
+                    "Sequence": sequence + offset,
+                    "Fee": fee,
+                    "LastLedgerSequence": last_ledger_sequence
+                })
+                tx_dicts.append(tx_dict)
+                filled_entries.append({
+                    "index": index,
+                    "account": wallet.address,
+                    "sequence": sequence + offset,
+                    "min_ledger": validated_ledger,
+                    "last_ledger_sequence": last_ledger_sequence,
+                    "template": template
+                })
+            sign_jobs.append((wallet, tx_dicts))
+        
+        return sign_jobs, filled_entries
+    
+    def submit_batch(self, builders: List[Callable[[str], Transaction]], window: int = 10,
+                     pace: Optional[Callable[[float], None]] = None) -> List[Dict[str, Any]]:
         """
-        Query recent transactions for the wallet.
+        Sign a batch in parallel, then submit it and wait for validation.
+        
+        Each wallet keeps at most `window` transactions in flight, which stays
+        within the per-account transaction queue limit.
+        
+        Args:
+            builders: Callables building each transaction for a given sender address
+            window: Maximum in-flight transactions per wallet
+            pace: Called with 1 before each submission, blocking until the
+                node request is allowed (e.g. `RequestScheduler.pacer`)
+            
+        Returns:
+            Results in input order: transaction details, or an "error" entry
+            (also for everything left when nothing validates within
+            `confirm_timeout` or a submission is interrupted)
+        """
+        entries = self.prepare_batch(builders)
+        self.confirmations.start()
+        
+        # Durable before the first submission, so a crash mid-batch loses nothing
+        if self.outbox is not None:
+            for entry, outbox_entry in zip(entries, self.outbox.enqueue_signed(entries)):
+                entry["outbox_entry"] = outbox_entry
+        
+        # Per-wallet submission queues in sequence order
+        queues: Dict[str, deque] = {}
+        for entry in sorted(entries, key=lambda entry: entry["sequence"]):
+            queues.setdefault(entry["account"], deque()).append(entry)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        in_flight: Dict[Future, Dict[str, Any]] = {}
+        
+        def settle(entry: Dict[str, Any], error: Optional[str] = None):
+            # Keep the outbox in step with the result reported for the entry
+            outbox_entry = entry.get("outbox_entry")
+            if outbox_entry is None:
+                return
+            # Synced once before returning rather than once per entry
+            if error is None:
+                self.outbox.complete(outbox_entry, entry["hash"], durable=False)
+            else:
+                self.outbox.fail(outbox_entry, error, durable=False)
+        
+        def hand_over(entry: Dict[str, Any]) -> str:
+            # An entry that may still validate is left to the outbox to reconcile
+            self.confirmations.forget(entry["hash"])
+            outbox_entry = entry.get("outbox_entry")
+            if outbox_entry is None:
+                return "it may still validate"
+            self._deliver_in_background(outbox_entry)
+            return "it remains in the outbox and will still be delivered"
+        
+        def fail_remaining(account: str, reason: str):
+            # Later sequence numbers can never validate after a gap
+            for skipped in queues.pop(account, []):
+                results[skipped["index"]] = {"error": reason, "account": account}
+                settle(skipped, reason)
+            self.wallet_pool.resync_sequence(account)
+        
+        while queues or in_flight:
+            for account in list(queues):
+                queue = queues[account]
+                active = sum(1 for entry in in_flight.values() if entry["account"] == account)
+                
+                while queue and active < window:
+                    entry = queue.popleft()
+                    if pace is not None:
+                        pace(1)
+                    future = self.confirmations.track(
+                        entry["hash"], entry["last_ledger_sequence"], entry["min_ledger"]
+                    )
+                    if "outbox_entry" in entry:
+                        entry["outbox_entry"].maybe_submitted = True
+                    try:
+                        response = self.client.request(SubmitOnly(tx_blob=entry["tx_blob"]))
+                    except Exception as e:
+                        # The blob may have reached the node before the connection dropped
+                        results[entry["index"]] = {
+                            "error": f"Submission of {entry['hash']} interrupted: {str(e)}; {hand_over(entry)}",
+                            "txHash": entry["hash"],
+                            "account": account
+                        }
+                        fail_remaining(
+                            account, f"Not submitted: submission of sequence {entry['sequence']} was interrupted"
+                        )
+                        break
+                    engine_result = response.result.get("engine_result", "")
+                    
+                    if not response.is_successful() or engine_result.startswith(("tem", "tef")):
+                        self.confirmations.forget(entry["hash"])
+                        results[entry["index"]] = {
+                            "error": f"Transaction failed: {engine_result or response.result}",
+                            "account": account
+                        }
+                        settle(entry, results[entry["index"]]["error"])
+                        fail_remaining(account, f"Skipped after sequence {entry['sequence']} failed")
+                        break
+                    
+                    in_flight[future] = entry
+                    active += 1
+                
+                if account in queues and not queues[account]:
+                    del queues[account]
+            
+            if not in_flight:
+                continue
+            
+            done, _ = wait(list(in_flight), timeout=self.confirm_timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Give up on what is left, keeping the results already in hand
+                for entry in in_flight.values():
+                    results[entry["index"]] = {
+                        "error": f"Transaction {entry['hash']} not validated within {self.confirm_timeout}s; "
+                                 f"{hand_over(entry)}",
+                        "txHash": entry["hash"],
+                        "account": entry["account"]
+                    }
+                for account in list(queues):
+                    fail_remaining(account, f"Not submitted: batch stalled for {self.confirm_timeout}s")
+                for account in {entry["account"] for entry in in_flight.values()}:
+                    self.wallet_pool.resync_sequence(account)
+                in_flight.clear()
+                break
+            
+            for future in done:
+                entry = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    results[entry["index"]] = {"error": str(e), "account": entry["account"]}
+                    settle(entry, str(e))
+                    # A validated failure (tec) still consumes its sequence; an expiry does not
+                    if isinstance(e, TransactionExpired):
+                        fail_remaining(entry["account"], f"Skipped after sequence {entry['sequence']} expired")
+                    continue
+                
+                self.tx_cache.put(result.get("hash"), result)
+                settle(entry)
+                results[entry["index"]] = {
+                    "txHash": result.get("hash"),
+                    "explorerUrl": f"{self.explorer_base}/transactions/{result.get('hash')}",
+                    "ledgerIndex": result.get("ledger_index"),
+                    "closeTime": self.close_time_iso(result),
+                    "validated": True,
+                    "account": entry["account"]
+                }
+        
+        if self.outbox is not None:
+            # A failure reported to the caller must not be redelivered after a crash
+            self.outbox.flush()
+        
+        failed = sum(1 for result in results if "error" in result)
+        print(f"✅ Batch complete: {len(results) - failed} validated, {failed} failed")
+        
+        return results
+    
+    def query_account_transactions(self, limit: int = 50, account: Optional[str] = None) -> List[Dict]:
+        """
+        Query recent transactions for a wallet.
         
         Args:
             limit: Maximum number of transactions to retrieve
+            account: Address to query (defaults to the primary wallet)
             
         Returns:
             List of transaction dictionaries
@@ -114,11 +707,12 @@ class XRPLClient:
         
         try:
             request = AccountTx(
-                account=self.wallet.address,
+                account=account or self.wallet.address,
                 limit=limit
             )
             
-            response = self.client.request(request)
+            with span("xrpl.account_tx", account=request.account, limit=limit):
+                response = self.client.request(request)
             
             if response.is_successful():
                 transactions = response.result.get("transactions", [])
@@ -134,19 +728,31 @@ class XRPLClient:
         """
         Get details of a specific transaction.
         
+        Validated transactions are immutable, so they are served from the
+        transaction cache without network I/O once seen.
+        
         Args:
             tx_hash: Transaction hash to query
             
         Returns:
             Transaction details dictionary
         """
+        with span("xrpl.tx_cache_lookup", tx_hash=tx_hash) as lookup_span:
+            cached = self.tx_cache.get(tx_hash)
+            lookup_span.set_attribute("hit", cached is not None)
+        if cached is not None:
+            return cached
+        
         self.connect()
         
         try:
             request = Tx(transaction=tx_hash)
-            response = self.client.request(request)
+            with span("xrpl.tx", tx_hash=tx_hash):
+                response = self.client.request(request)
             
             if response.is_successful():
+                # Only validated results are cached
+                self.tx_cache.put(tx_hash, response.result)
                 return response.result
             else:
                 raise Exception(f"Transaction not found: {tx_hash}")
@@ -169,10 +775,6 @@ class XRPLClient:
         self.connect()
         
         try:
-            # Validate destination is different from sender
-            if destination == self.wallet.address:
-                raise ValueError("Destination cannot be the same as sender address")
-            
             memos = []
             if memo:
                 memos.append(Memo(
@@ -180,18 +782,18 @@ class XRPLClient:
                     memo_data=str_to_hex(memo)
                 ))
             
-            payment = Payment(
-                account=self.wallet.address,
-                destination=destination,
-                amount=str(amount_drops),
-                memos=memos if memos else None
-            )
-            
             print(f"💸 Sending {amount_drops} drops to {destination}...")
-            # Submit and wait - handles autofill and signing automatically
-            response = submit_and_wait(payment, self.client, self.wallet)
+            # Destination is excluded so the sender always differs from it
+            result, account = self.submit_from_pool(
+                lambda address: Payment(
+                    account=address,
+                    destination=destination,
+                    amount=str(amount_drops),
+                    memos=memos if memos else None
+                ),
+                exclude=destination
+            )
             
-            result = response.result
             tx_hash = result.get("hash")
             
             print(f"✅ Payment successful: {tx_hash}")
@@ -200,7 +802,8 @@ class XRPLClient:
                 "txHash": tx_hash,
                 "explorerUrl": f"{self.explorer_base}/transactions/{tx_hash}",
                 "amount": amount_drops,
-                "destination": destination
+                "destination": destination,
+                "account": account
             }
             
         except Exception as e:
@@ -0,0 +1,66 @@
+"""Test confirmation tracker expiry (offline)"""
+from xrpl.models.response import Response, ResponseStatus
+
+from src.confirmation_tracker import ConfirmationTracker, TransactionExpired
+
+
+class FakeClient:
+    """Answers every `tx` request with a fixed result."""
+    
+    def __init__(self, status, result):
+        self.response = Response(status=status, result=result)
+        self.requests = []
+    
+    def request(self, request):
+        self.requests.append(request)
+        return self.response
+
+
+def _close(tracker, client, ledger_index):
+    tracker._handle_message(client, {"type": "ledgerClosed", "ledger_index": ledger_index})
+
+
+def test_expires_only_after_complete_search():
+    tracker = ConfirmationTracker("wss://unused", [])
+    future = tracker.track("ABC", 110, min_ledger=90)
+    client = FakeClient(ResponseStatus.ERROR, {"error": "txnNotFound", "searched_all": True})
+    
+    _close(tracker, client, 110)
+    assert not future.done() and client.requests == []
+    
+    _close(tracker, client, 111)
+    [request] = client.requests
+    assert (request.transaction, request.min_ledger, request.max_ledger) == ("ABC", 90, 110)
+    assert isinstance(future.exception(), TransactionExpired)
+
+
+def test_incomplete_search_keeps_pending():
+    tracker = ConfirmationTracker("wss://unused", [])
+    future = tracker.track("ABC", 110, min_ledger=90)
+    
+    # The node is missing part of the range
+    _close(tracker, FakeClient(ResponseStatus.ERROR, {"error": "txnNotFound", "searched_all": False}), 111)
+    assert not future.done() and tracker.pending_count() == 1
+    
+    # Validated after all; a later close finds it
+    validated = {"hash": "ABC", "validated": True, "ledger_index": 105,
+                 "meta": {"TransactionResult": "tesSUCCESS"}, "tx_json": {"Account": "rA"}}
+    _close(tracker, FakeClient(ResponseStatus.SUCCESS, validated), 112)
+    assert future.result()["ledger_index"] == 105
+
+
+def test_unknown_signing_ledger_never_expires():
+    tracker = ConfirmationTracker("wss://unused", [])
+    future = tracker.track("ABC", 110)
+    client = FakeClient(ResponseStatus.ERROR, {"error": "txnNotFound"})
+    
+    _close(tracker, client, 111)
+    assert client.requests[0].min_ledger is None
+    assert not future.done()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,154 @@
+"""Test the memory-mapped digest table (offline)"""
+import hashlib
+import tempfile
+import time
+
+import pytest
+
+from src.digest_table import DigestTable
+
+
+def _digest(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+def _tx(n):
+    return hashlib.sha256(f"tx{n}".encode()).hexdigest().upper()
+
+
+@pytest.fixture(params=["memory", "disk"])
+def table_path(request):
+    if request.param == "memory":
+        yield None
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            yield directory
+
+
+def test_lookup(table_path):
+    table = DigestTable(table_path, merge_threshold=50)
+    assert table.add_many((_digest(n), 1000 + n, 2000 + n, _tx(n)) for n in range(120)) == 120
+    
+    for n in (0, 49, 50, 119):
+        assert table.get(_digest(n)) == (1000 + n, 2000 + n, _tx(n))
+    assert table.get(_digest(n).upper()) == (1119, 2119, _tx(119))
+    assert table.get(_digest(999)) is None
+    assert table.get("not hex") is None
+    assert table.get("ab" * 31) is None
+    assert len(table) == 120
+    table.close()
+
+
+def test_earliest_anchor_wins(table_path):
+    table = DigestTable(table_path)
+    table.add_many([(_digest(1), 500, 5, _tx(1))])
+    
+    # Later anchors of the same digest are not written
+    assert table.add_many([(_digest(1), 600, 6, _tx(2))]) == 0
+    assert table.add_many([(_digest(1), 400, 4, _tx(3)), (_digest(1), 300, 3, _tx(4))]) == 1
+    assert table.get(_digest(1)) == (300, 3, _tx(4))
+    
+    table.merge()
+    assert table.add_many([(_digest(1), 350, 3, _tx(5))]) == 0
+    assert table.add_many([(_digest(1), 200, 2, _tx(6))]) == 1
+    assert len(table) == 1
+    table.merge()
+    assert table.get(_digest(1)) == (200, 2, _tx(6))
+    assert len(table) == 1
+    table.close()
+
+
+def test_merge_keeps_every_record(table_path):
+    table = DigestTable(table_path)
+    table.add_many((_digest(n), n, n, _tx(n)) for n in range(0, 300, 2))
+    table.merge()
+    
+    # Interleaved with the base, plus one digest already in it
+    table.add_many((_digest(n), n, n, _tx(n)) for n in range(1, 300, 2))
+    table.add_many([(_digest(0), 0, 0, _tx(0))])
+    assert len(table) == 300
+    table.merge()
+    
+    assert len(table) == 300
+    assert all(table.get(_digest(n)) == (n, n, _tx(n)) for n in range(300))
+    table.close()
+
+
+def test_merge_runs_in_background(table_path):
+    table = DigestTable(table_path, merge_threshold=50)
+    merges = []
+    write_merged = table._write_merged
+    
+    def slow_write_merged(out, delta):
+        merges.append(len(delta))
+        time.sleep(0.2)
+        return write_merged(out, delta)
+    
+    table._write_merged = slow_write_merged
+    started = time.monotonic()
+    table.add_many((_digest(n), n, n, _tx(n)) for n in range(60))
+    assert time.monotonic() - started < 0.2
+    
+    deadline = time.monotonic() + 5
+    while table._base_count < 60 and time.monotonic() < deadline:
+        assert table.get(_digest(59)) == (59, 59, _tx(59))
+        time.sleep(0.01)
+    assert merges == [60] and table._base_count == 60 and len(table) == 60
+    table.close()
+
+
+def test_appends_during_merge_are_kept(table_path):
+    table = DigestTable(table_path)
+    table.add_many((_digest(n), n, n, _tx(n)) for n in range(10))
+    write_merged = table._write_merged
+    
+    def write_merged_with_appends(out, delta):
+        # New digests and an earlier anchor of one being merged
+        table.add_many([(_digest(10), 10, 10, _tx(10)), (_digest(3), 1, 1, _tx(11))])
+        return write_merged(out, delta)
+    
+    table._write_merged = write_merged_with_appends
+    table.merge()
+    
+    assert table._base_count == 10 and len(table) == 11
+    assert table.get(_digest(10)) == (10, 10, _tx(10))
+    assert table.get(_digest(3)) == (1, 1, _tx(11))
+    
+    table._write_merged = write_merged
+    table.merge()
+    assert table._base_count == 11 and len(table) == 11
+    assert table.get(_digest(3)) == (1, 1, _tx(11))
+    table.close()
+
+
+def test_len_counts_digests_in_base_and_delta_once(table_path):
+    table = DigestTable(table_path)
+    table.add_many([(_digest(1), 10, 1, _tx(1)), (_digest(2), 20, 2, _tx(2))])
+    table.merge()
+    
+    # Earlier anchor of a digest already in the base
+    table.add_many([(_digest(1), 5, 1, _tx(3)), (_digest(3), 30, 3, _tx(4))])
+    assert len(table) == 3
+    table.close()
+
+
+def test_reopen_and_second_process():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = DigestTable(directory, merge_threshold=40)
+        reader = DigestTable(directory)
+        writer.add_many((_digest(n), n, n, _tx(n)) for n in range(100))
+        
+        # Appends and merges by another process are picked up
+        assert reader.get(_digest(99)) == (99, 99, _tx(99))
+        assert len(reader) == 100
+        writer.add_many([(_digest(5), 1, 1, _tx(500))])
+        assert reader.get(_digest(5)) == (1, 1, _tx(500))
+        assert len(reader) == 100
+        writer.close()
+        reader.close()
+        
+        reopened = DigestTable(directory)
+        assert len(reopened) == 100
+        assert reopened.get(_digest(5)) == (1, 1, _tx(500))
+        assert reopened.get(_digest(42)) == (42, 42, _tx(42))
+        reopened.close()
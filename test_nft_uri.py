@@ -0,0 +1,64 @@
+"""Test NFT URI encoding (offline)"""
+import pytest
+
+from src.nft_uri import MAX_URI_BYTES, decode_uri, encode_compact, encode_legacy
+
+DIGEST = "143862b7a0c09bf5582d33c4380660918684c78e2e2c02c14c54629f97f0b652"
+DATA = {
+    "cid": "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG",
+    "metadata": {
+        "sha256": DIGEST,
+        "title": "Birth Certificate",
+        "caseId": "CR-2025-0042",
+        "documentType": "birth-certificate"
+    }
+}
+
+# Minted URIs must decode forever, so these bytes are part of the format
+PINNED_PLAIN = (
+    bytes([0xC1, 0x12]) + bytes.fromhex(DIGEST)
+    + b'{"c":"QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG","t":"Birth Certificate",'
+      b'"k":"CR-2025-0042","x":{"documentType":"birth-certificate"}}'
+)
+PINNED_DEFLATED = bytes.fromhex(
+    "c113" + DIGEST
+    + "83d191e58e015e5565a6ce51c5798e6646a6c5c611694679a9b92591e901051e29e1ae55e696f959e179014929ee785c"
+      "89ec14030313231c618f1938b5b500"
+)
+
+
+def test_compact_encoding_is_pinned():
+    assert encode_compact(DATA, compress=False) == PINNED_PLAIN
+    assert decode_uri(PINNED_PLAIN) == DATA
+    # Deflate output may differ between zlib builds; the header and decoding may not
+    assert encode_compact(DATA)[:34] == PINNED_DEFLATED[:34]
+    assert decode_uri(PINNED_DEFLATED) == DATA
+
+
+def test_round_trips():
+    data = dict(DATA, metadata=dict(DATA["metadata"], issuedAt="2025-03-01", note="ünïcode"), extra=1)
+    assert len(encode_compact(data)) <= MAX_URI_BYTES < len(encode_legacy(data))
+    for uri in (encode_compact(data), encode_compact(data, compress=False), encode_legacy(data)):
+        assert decode_uri(uri) == data
+    
+    # No valid digest: kept as text under the extra fields
+    data = {"cid": "QmX", "metadata": {"sha256": "not-a-digest"}}
+    assert decode_uri(encode_compact(data)) == data
+
+
+@pytest.mark.parametrize("uri", [
+    b"",
+    b"\xff\xfe",
+    b"not json",
+    bytes([0xC1]),
+    bytes([0xC1, 0x21]) + b"{}",
+    PINNED_DEFLATED[:40],
+    PINNED_DEFLATED[:34] + b"\x00garbage",
+    PINNED_PLAIN[:20],
+    bytes([0xC1, 0x10]) + b"[1]",
+    bytes([0xC1, 0x10]) + b'{"x":1}',
+    bytes([0xC1, 0x10]) + b'{"_":[1]}',
+])
+def test_malformed_uri_raises_value_error(uri):
+    with pytest.raises(ValueError):
+        decode_uri(uri)
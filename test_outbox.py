@@ -0,0 +1,126 @@
+"""Test outbox replay and crash recovery (offline)"""
+import json
+import os
+import tempfile
+
+from src.outbox import Outbox, open_outbox
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _sign(outbox, entry, n):
+    outbox.mark_signed(entry, account="rAccount", tx_hash=f"HASH{n}", last_ledger_sequence=100 + n,
+                       tx_blob=f"BLOB{n}", min_ledger=80 + n)
+
+
+def test_replay_restores_pending_entries():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "outbox.jsonl")
+        outbox = Outbox(path)
+        
+        queued = outbox.enqueue({"TransactionType": "AccountSet"})
+        signed = outbox.enqueue({"TransactionType": "AccountSet"}, exclude="rExcluded")
+        _sign(outbox, signed, 1)
+        expired = outbox.enqueue({"TransactionType": "AccountSet"})
+        _sign(outbox, expired, 2)
+        outbox.mark_expired(expired)
+        done = outbox.enqueue({"TransactionType": "AccountSet"})
+        _sign(outbox, done, 3)
+        outbox.complete(done, "HASH3")
+        failed = outbox.enqueue({"TransactionType": "AccountSet"})
+        outbox.fail(failed, "tecNO_PERMISSION")
+        outbox.close()
+        
+        reopened = Outbox(path)
+        entries = {entry.id: entry for entry in reopened.pending()}
+        assert set(entries) == {queued.id, signed.id, expired.id}
+        
+        assert not entries[queued.id].signed
+        
+        replayed = entries[signed.id]
+        assert replayed.signed and replayed.maybe_submitted
+        assert (replayed.account, replayed.tx_hash, replayed.tx_blob) == ("rAccount", "HASH1", "BLOB1")
+        assert (replayed.min_ledger, replayed.last_ledger_sequence) == (81, 101)
+        assert replayed.exclude == "rExcluded"
+        
+        # Expired blobs are signed again rather than resubmitted
+        assert not entries[expired.id].signed
+        assert entries[expired.id].attempts == 1
+        reopened.close()
+        
+        # Opening compacts finished entries away
+        ids = {record["id"] for record in _records(path)}
+        assert ids == {queued.id, signed.id, expired.id}
+
+
+def test_batch_writes_are_replayed_until_settled():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "outbox.jsonl")
+        outbox = Outbox(path)
+        writes = [{"template": {"TransactionType": "AccountSet"}, "account": "rAccount", "hash": f"HASH{n}",
+                   "last_ledger_sequence": 100, "min_ledger": 80, "tx_blob": f"BLOB{n}"} for n in range(3)]
+        done, failed, in_doubt = outbox.enqueue_signed(writes)
+        
+        outbox.complete(done, "HASH0", durable=False)
+        outbox.fail(failed, "Not submitted", durable=False)
+        outbox.flush()
+        outbox.close()
+        
+        # Only the one that may still validate is reconciled after a restart
+        [replayed] = Outbox(path).pending()
+        assert replayed.id == in_doubt.id
+        assert (replayed.tx_hash, replayed.tx_blob, replayed.attempts) == ("HASH2", "BLOB2", 1)
+        assert replayed.maybe_submitted and replayed.min_ledger == 80
+
+
+def test_torn_final_line_is_ignored():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "outbox.jsonl")
+        outbox = Outbox(path)
+        entry = outbox.enqueue({"TransactionType": "AccountSet"})
+        outbox.close()
+        
+        # Crash in the middle of appending the signed record
+        with open(path, "a") as f:
+            f.write('{"op": "signed", "id": "%s", "hash": "HA' % entry.id)
+        
+        reopened = Outbox(path)
+        [replayed] = reopened.pending()
+        assert replayed.id == entry.id and not replayed.signed
+        
+        # The torn line is dropped, so later appends stay readable
+        _sign(reopened, replayed, 1)
+        reopened.close()
+        [replayed] = Outbox(path).pending()
+        assert replayed.tx_hash == "HASH1"
+
+
+def test_second_process_gets_its_own_slot():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "outbox.jsonl")
+        first = open_outbox(path)
+        second = open_outbox(path)
+        assert first.path == path
+        assert second.path == os.path.join(directory, "outbox.1.jsonl")
+        
+        entry = second.enqueue({"TransactionType": "AccountSet"})
+        _sign(second, entry, 1)
+        second.close()
+        first.close()
+        
+        # The next server adopts what the exited one left behind
+        third = open_outbox(path)
+        [adopted] = third.pending()
+        assert adopted.id == entry.id and adopted.tx_hash == "HASH1" and adopted.min_ledger == 81
+        third.close()
+        assert Outbox(os.path.join(directory, "outbox.1.jsonl")).pending() == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,138 @@
+"""Test tool-call admission control (offline)"""
+import asyncio
+import threading
+
+import pytest
+
+from src.scheduler import PRIORITY_READ, PRIORITY_WRITE, RequestScheduler, SchedulerBusy, TokenBucket
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_reads_are_admitted_before_writes():
+    async def main():
+        scheduler = RequestScheduler(rate=1000, burst=1000, default_concurrency=1)
+        gate = threading.Event()
+        order = []
+        
+        # Hold the only slot so both calls queue behind it
+        blocker = asyncio.create_task(scheduler.run("tool", gate.wait, cost=0))
+        await asyncio.sleep(0.05)
+        write = asyncio.create_task(scheduler.run("tool", order.append, "write", priority=PRIORITY_WRITE))
+        read = asyncio.create_task(scheduler.run("tool", order.append, "read", priority=PRIORITY_READ))
+        await asyncio.sleep(0.05)
+        assert order == []
+        
+        gate.set()
+        await asyncio.gather(blocker, write, read)
+        assert order == ["read", "write"]
+    
+    _run(main())
+
+
+def test_per_tool_concurrency_limit():
+    async def main():
+        scheduler = RequestScheduler(rate=1000, burst=1000, concurrency={"slow": 2})
+        gate = threading.Event()
+        
+        slow = [asyncio.create_task(scheduler.run("slow", gate.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert scheduler.stats() == {"queued": 1, "active": {"slow": 2}}
+        
+        # A tool at its limit does not hold up other tools
+        assert await scheduler.run("other", lambda: "done") == "done"
+        
+        gate.set()
+        await asyncio.gather(*slow)
+        assert scheduler.stats() == {"queued": 0, "active": {}}
+    
+    _run(main())
+
+
+def test_full_queue_rejects_at_once():
+    async def main():
+        scheduler = RequestScheduler(rate=1000, burst=1000, max_queue=1, default_concurrency=1)
+        gate = threading.Event()
+        
+        running = asyncio.create_task(scheduler.run("tool", gate.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(scheduler.run("tool", lambda: None))
+        await asyncio.sleep(0.05)
+        
+        with pytest.raises(SchedulerBusy, match="queued"):
+            await scheduler.run("tool", lambda: None)
+        
+        gate.set()
+        await asyncio.gather(running, queued)
+    
+    _run(main())
+
+
+def test_admission_timeout():
+    async def main():
+        scheduler = RequestScheduler(rate=1, burst=1, queue_timeout=0.1)
+        await scheduler.run("tool", lambda: None, cost=1)
+        
+        with pytest.raises(SchedulerBusy, match="waited"):
+            await scheduler.run("tool", lambda: None, cost=1)
+        # The timed-out call left the queue
+        assert scheduler.stats()["queued"] == 0
+    
+    _run(main())
+
+
+def test_zero_cost_calls_pass_a_starved_waiter():
+    async def main():
+        scheduler = RequestScheduler(rate=1, burst=1, queue_timeout=5)
+        await scheduler.run("verify", lambda: None, cost=1)
+        
+        # Waits ~1 s for a token; the local call must not wait behind it
+        starved = asyncio.create_task(scheduler.run("verify", lambda: "verified", priority=PRIORITY_READ))
+        await asyncio.sleep(0.05)
+        started = asyncio.get_running_loop().time()
+        assert await scheduler.run("append_chunk", lambda: "hashed", priority=PRIORITY_WRITE, cost=0) == "hashed"
+        assert asyncio.get_running_loop().time() - started < 0.5
+        assert not starved.done()
+        assert await starved == "verified"
+    
+    _run(main())
+
+
+def test_pacer_lets_reads_in_between():
+    async def main():
+        scheduler = RequestScheduler(rate=50, burst=2, queue_timeout=2)
+        submitted = []
+        
+        def batch(pace):
+            for n in range(40):
+                pace(1)
+                submitted.append(n)
+        
+        running = asyncio.create_task(scheduler.run("batch", batch, scheduler.pacer(PRIORITY_WRITE), cost=1))
+        await asyncio.sleep(0.1)
+        await scheduler.run("verify", lambda: None, priority=PRIORITY_READ, cost=1)
+        # Admitted long before the batch finished paying for its submissions
+        assert len(submitted) < 40
+        await running
+        assert len(submitted) == 40
+    
+    _run(main())
+
+
+def test_bucket_debt():
+    bucket = TokenBucket(rate=1, burst=5)
+    assert bucket.try_take(3) == 0
+    # Costs above the burst wait for a full bucket, then leave it in debt
+    assert bucket.try_take(8) > 0
+    bucket._tokens = 5
+    assert bucket.try_take(8) == 0
+    assert bucket.try_take(1) == pytest.approx(4, abs=0.1)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
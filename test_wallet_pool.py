@@ -0,0 +1,89 @@
+"""Test wallet pool Sequence reservation (offline)"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from xrpl.wallet import Wallet
+
+from src.wallet_pool import WalletPool
+
+SEEDS = [Wallet.create().seed, Wallet.create().seed]
+
+
+class FakeLedger:
+    """Counts Sequence reads; returns a fixed next Sequence per account."""
+    
+    def __init__(self, sequence):
+        self.sequence = sequence
+        self.fetches = []
+        self._lock = threading.Lock()
+    
+    def fetch(self, address):
+        with self._lock:
+            self.fetches.append(address)
+        return self.sequence
+
+
+def test_concurrent_reservations_are_unique():
+    pool = WalletPool(SEEDS[:1])
+    address = pool.primary.address
+    ledger = FakeLedger(100)
+    
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        sequences = list(executor.map(lambda _: pool.reserve_sequences(address, 1, ledger.fetch), range(500)))
+    
+    assert sorted(sequences) == list(range(100, 600))
+    # Read once, then allocated locally
+    assert ledger.fetches == [address]
+
+
+def test_runs_of_sequences():
+    pool = WalletPool(SEEDS)
+    first, second = pool.addresses
+    ledger = FakeLedger(7)
+    
+    assert pool.reserve_sequences(first, 5, ledger.fetch) == 7
+    assert pool.reserve_sequences(first, 1, ledger.fetch) == 12
+    assert pool.reserve_sequences(first, 3, ledger.fetch) == 13
+    assert pool.reserve_sequences(first, 1, ledger.fetch) == 16
+    # Wallets are allocated independently
+    assert pool.reserve_sequences(second, 2, ledger.fetch) == 7
+    assert ledger.fetches == [first, second]
+
+
+def test_resync_forces_a_fetch():
+    pool = WalletPool(SEEDS)
+    first, second = pool.addresses
+    ledger = FakeLedger(20)
+    
+    pool.reserve_sequences(first, 3, ledger.fetch)
+    pool.reserve_sequences(second, 1, ledger.fetch)
+    
+    # 21 and 22 were never consumed; the ledger still says 21
+    ledger.sequence = 21
+    pool.resync_sequence(first)
+    assert pool.reserve_sequences(first, 1, ledger.fetch) == 21
+    assert pool.reserve_sequences(second, 1, ledger.fetch) == 21
+    assert ledger.fetches == [first, second, first]
+    
+    # Unknown addresses are ignored
+    pool.resync_sequence("rUnknown")
+
+
+def test_failed_fetch_reserves_nothing():
+    pool = WalletPool(SEEDS[:1])
+    address = pool.primary.address
+    
+    def offline(_):
+        raise ConnectionError("node unreachable")
+    
+    with pytest.raises(ConnectionError):
+        pool.reserve_sequences(address, 1, offline)
+    assert pool.reserve_sequences(address, 1, FakeLedger(5).fetch) == 5
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")